@@ -4,6 +4,7 @@ Common utilities for tracing and verification scripts.
 
 import csv
 from dataclasses import dataclass
+import sys
 # import getpass
 from typing import *
 
@@ -34,7 +35,10 @@ class SampledSignal:
         return smt.bv_variable(self.signal_name, self.width)
 
     def get_qualified_path(self):
-        return "->".join(self.hierarchy) + "->" + self.signal_name
+        # Qualified paths are rebuilt on every call and stored as dict keys throughout guidance
+        # and sampling code. Interning makes equal paths share one string object, which saves
+        # memory and lets string equality checks stop at the identity comparison
+        return sys.intern("->".join(self.hierarchy) + "->" + self.signal_name)
 
     def get_base_path(self):
         return self.signal_name
@@ -60,7 +64,8 @@ class SampledSignal:
         of the fully qualified path.
         """
         if self.bounds:
-            return ["->".join(self.hierarchy) + "->" + self.signal_name + '[{}]'.format(i)
+            prefix = "->".join(self.hierarchy) + "->" + self.signal_name
+            return [sys.intern(prefix + '[{}]'.format(i))
                 for i in range(self.bounds[0], self.bounds[1] + 1)]
         else:
             return [self.get_qualified_path()]
@@ -4,8 +4,8 @@ Annotations that provide guidance for oracles.
 
 from collections import defaultdict
 from dataclasses import dataclass, field
-from enum import Enum
-from typing import Dict, List, Tuple, Set, Optional, Union
+from enum import Enum, auto
+from typing import Dict, FrozenSet, List, Tuple, Optional, Union
 
 import rtl2model.lynth.smt as smt
 
@@ -77,31 +77,101 @@ to exist in the top level module.
 AnnoType.OutputIndexed = lambda b, v: AnnoType(3, [b], v)
 
 
+class _AnnoMode(Enum):
+    """How the annotations of a single signal are keyed."""
+    EMPTY = auto()
+    """No cycle or predicate annotations have been added (a uniform annotation may still apply)."""
+    CYCLE = auto()
+    """Annotations are keyed by cycle number."""
+    PREDICATE = auto()
+    """Annotations are keyed by `smt.Term` predicates."""
+
+
+class _SigEntry:
+    """
+    Annotations for a single signal, along with a cached discriminator for whether
+    they are keyed by cycle or by predicate.
+
+    Cycle annotations are stored sparsely: any cycle missing from `data` takes on
+    the value of `default`.
+    """
+    __slots__ = ("mode", "data", "default")
+
+    def __init__(self, mode: _AnnoMode, data: dict, default: AnnoType):
+        self.mode = mode
+        self.data = data
+        self.default = default
+
+    def get_outputs(self, num_cycles: int) -> List[Tuple[smt.Term, Union[int, smt.Term]]]:
+        """
+        Returns (output ref, cycle number | condition) pairs for all output annotations of
+        this signal within the first `num_cycles` cycles.
+        """
+        if self.mode is _AnnoMode.PREDICATE:
+            # HACK: assumes only one output thing in predicate list
+            return [(annos[0].expr, n) for n, annos in self.data.items() if annos[0].is_output()]
+        elif self.default.is_output():
+            # Every cycle not overridden in `data` is an output
+            outputs = []
+            for n in range(num_cycles):
+                t = self.data.get(n, self.default)
+                if t.is_output():
+                    outputs.append((t.expr, n))
+            return outputs
+        else:
+            return [(t.expr, n) for n, t in self.data.items() if t.is_output()]
+
+
+def _new_sig_entry(default=None) -> _SigEntry:
+    if default is None:
+        default = AnnoType.DONT_CARE
+    return _SigEntry(_AnnoMode.EMPTY, {}, default)
+
+
 class Guidance:
     """
     Allows the user to provide guidance for whether or not a value at a particular clock cycle
     is `DONT_CARE` ("Don't Care"), `ASSUME` ("Assumed" to be the value read during simulation),
     `Param` ("Parameter" of a synthesis function), or `Output` ("Output" of the synthesis function).
     """
+    __slots__ = (
+        "signals",
+        "signal_names",
+        "base_names",
+        "base_to_qualified",
+        "_signal_name_set",
+        "num_cycles",
+        "_guide_dict",
+        "_outputs",
+    )
 
     def __init__(self, signals, num_cycles: int):
         self.signals = signals
-        self.signal_names = [qpath for s in self.signals for qpath in s.get_all_qp_instances()]
-        self.base_names = [basename for s in self.signals for basename in s.get_all_bp_instances()]
-        self.base_to_qualified = dict(zip(self.base_names, self.signal_names))
+        self.signal_names = []
+        self.base_names = []
+        self.base_to_qualified = {}
+        for s in self.signals:
+            for qpath, basename in zip(s.get_all_qp_instances(), s.get_all_bp_instances()):
+                self.signal_names.append(qpath)
+                self.base_names.append(basename)
+                self.base_to_qualified[basename] = qpath
+        self._signal_name_set = frozenset(self.signal_names)
         self.num_cycles = num_cycles
-        # Maps qualified signal names to maps of cycle -> AnnoType
+        # Maps qualified signal names to entries holding maps of cycle -> AnnoType
         # OR maps of smt.Term -> AnnoType
-        self._guide_dict: Dict[str, Union[Dict[int, AnnoType], Dict[smt.Term, AnnoType]]] = defaultdict(lambda: defaultdict(lambda: AnnoType.DONT_CARE))
+        self._guide_dict: Dict[str, _SigEntry] = defaultdict(_new_sig_entry)
+        # (num_cycles, result) of the last `get_outputs` call, cleared whenever annotations change
+        self._outputs = None
 
     def _validate_signame(self, signal):
+        if signal in self._signal_name_set:
+            return signal
         if not isinstance(signal, str):
             raise TypeError(f"Guidances are keyed by signal name, instead got {signal}")
-        if signal not in self.signal_names:
-            signal = self.base_to_qualified[signal]
-            if signal not in self.signal_names:
-                raise KeyError(signal)
-        return signal
+        qualified = self.base_to_qualified.get(signal)
+        if qualified is None:
+            raise KeyError(signal)
+        return qualified
 
     def annotate(self, signal, annotation):
         """
@@ -119,34 +189,80 @@ class Guidance:
         If the argument is an `AnnoType`, then apply that `AnnoType` for every cycle,
         overwriting any existing annotations.
         """
-        signal = self._validate_signame(signal)
         if isinstance(annotation, list):
-            for t, g in enumerate(annotation):
-                self._guide_dict[signal][t] = g
+            self.annotate_cycle_list(signal, annotation)
         elif isinstance(annotation, dict):
-            first_key = list(annotation.keys())[0]
-            own_dict = self._guide_dict[signal]
+            first_key = next(iter(annotation), None)
             if isinstance(first_key, int):
-                if len(own_dict) and isinstance(list(own_dict.keys())[0], smt.Term):
-                    raise Exception("Cannot update guidance for predicated signal with cycle count")
-                own_dict.update(annotation)
+                self.annotate_cycle_dict(signal, annotation)
             elif isinstance(first_key, smt.Term):
-                if len(own_dict) and isinstance(list(own_dict.keys())[0], int):
-                    raise Exception("Cannot update guidance for cycle count sampled signal with predicate")
-                new_anno_dict = {}
-                for k, v in annotation.items():
-                    if not isinstance(v, list):
-                        new_anno_dict[k] = [v]
-                    else:
-                        new_anno_dict[k] = v
-                own_dict.update(new_anno_dict)
+                self.annotate_predicate_dict(signal, annotation)
             else:
                 raise Exception(f"Cannot interpret annotation: {annotation}")
         elif isinstance(annotation, AnnoType):
-            self._guide_dict[signal] = defaultdict(lambda: annotation)
+            self.annotate_uniform(signal, annotation)
         else:
             raise Exception(f"Cannot interpret annotation: {annotation}")
 
+    def annotate_cycle_list(self, signal, annotation: List[AnnoType]):
+        """
+        Specify a cycle-by-cycle list of annotations, where the annotation at
+        index `t` applies to cycle `t`.
+        """
+        signal = self._validate_signame(signal)
+        entry = self._guide_dict[signal]
+        if entry.mode is _AnnoMode.PREDICATE:
+            raise Exception("Cannot update guidance for predicated signal with cycle count")
+        for t, g in enumerate(annotation):
+            # Cycles matching the default are left out to keep storage sparse
+            if g == entry.default:
+                entry.data.pop(t, None)
+            else:
+                entry.data[t] = g
+        if annotation and entry.mode is _AnnoMode.EMPTY:
+            entry.mode = _AnnoMode.CYCLE
+        self._outputs = None
+
+    def annotate_cycle_dict(self, signal, annotation: Dict[int, AnnoType]):
+        """
+        Specify annotations for the cycles that appear as keys of `annotation`.
+        An empty dict leaves the signal's annotations unchanged.
+        """
+        signal = self._validate_signame(signal)
+        if not annotation:
+            return
+        entry = self._guide_dict[signal]
+        if entry.mode is _AnnoMode.PREDICATE:
+            raise Exception("Cannot update guidance for predicated signal with cycle count")
+        entry.data.update(annotation)
+        entry.mode = _AnnoMode.CYCLE
+        self._outputs = None
+
+    def annotate_predicate_dict(self, signal, annotation: Dict[smt.Term, Union[AnnoType, List[AnnoType]]]):
+        """
+        Specify annotations guarded by `rtl2model.lynth.smt.Term` predicates.
+        Values may be a single `AnnoType` or a list of them.
+        An empty dict leaves the signal's annotations unchanged.
+        """
+        signal = self._validate_signame(signal)
+        if not annotation:
+            return
+        entry = self._guide_dict[signal]
+        if entry.mode is _AnnoMode.CYCLE:
+            raise Exception("Cannot update guidance for cycle count sampled signal with predicate")
+        for k, v in annotation.items():
+            entry.data[k] = v if isinstance(v, list) else [v]
+        entry.mode = _AnnoMode.PREDICATE
+        self._outputs = None
+
+    def annotate_uniform(self, signal, annotation: AnnoType):
+        """
+        Apply `annotation` on every cycle, overwriting any existing annotations.
+        """
+        signal = self._validate_signame(signal)
+        self._guide_dict[signal] = _new_sig_entry(annotation)
+        self._outputs = None
+
     def get_annotation_at(self, signal, cycle) -> Optional[AnnoType]:
         """
         Gets the appropriate annotation for `signal` on the corresponding `cycle`.
@@ -155,35 +271,59 @@ class Guidance:
         signal = self._validate_signame(signal)
         if cycle >= self.num_cycles:
             raise IndexError(f"cycle {cycle} exceeds num_cycles {self.num_cycles}")
-        own_dict = self._guide_dict[signal]
-        if len(own_dict) and isinstance(list(own_dict.keys())[0], smt.Term):
+        entry = self._guide_dict.get(signal)
+        if entry is None:
+            return AnnoType.DONT_CARE
+        if entry.mode is _AnnoMode.PREDICATE:
             return None
-        return own_dict[cycle]
+        return entry.data.get(cycle, entry.default)
+
+    def get_cycle_annotations(self) -> List[Tuple[str, int, AnnoType]]:
+        """
+        Returns (qualified signal name, cycle, annotation) triples for every cycle annotation
+        that is not `DONT_CARE`. This is equivalent to, but much cheaper than, calling
+        `get_annotation_at` for every signal and cycle and discarding `DONT_CARE` results.
+        Signals annotated by predicates are omitted.
+        """
+        items = []
+        for signal, entry in self._guide_dict.items():
+            if entry.mode is _AnnoMode.PREDICATE:
+                continue
+            data = entry.data
+            if entry.default.is_dont_care():
+                # Only explicitly stored cycles can be anything but DONT_CARE
+                cycles = sorted(t for t in data if t < self.num_cycles)
+            else:
+                cycles = range(self.num_cycles)
+            for t in cycles:
+                anno = data.get(t, entry.default)
+                if not anno.is_dont_care():
+                    items.append((signal, t, anno))
+        return items
 
     def get_predicated_annotations(self, signal) -> Dict[smt.Term, List[AnnoType]]:
         """
-        Returns a dict of all predicate-based annotations for this signal.
+        Returns a dict of all predicate-based annotations for this signal. The dict is a copy,
+        so modifying it does not affect this guidance.
         """
         signal = self._validate_signame(signal)
-        own_dict = self._guide_dict[signal]
-        if len(own_dict) and isinstance(list(own_dict.keys())[0], smt.Term):
-            return own_dict
+        entry = self._guide_dict.get(signal)
+        if entry is not None and entry.mode is _AnnoMode.PREDICATE:
+            return {cond: annos[:] for cond, annos in entry.data.items()}
         else:
             return {}
 
-    def get_outputs(self) -> Set[Tuple[smt.Variable, str, Union[int, smt.Term]]]:
+    def get_outputs(self) -> FrozenSet[Tuple[smt.Variable, str, Union[int, smt.Term]]]:
         """
         Returns (output ref, signal name | condition, cycle number) pairs
-        representing all annotated outputs.
-        """
-        outputs = set()
-        for signal, cycles in self._guide_dict.items():
-            for n in cycles:
-                # HACK: assumes only one output thing in predicate list
-                if isinstance(cycles[n], list):
-                    t = cycles[n][0]
-                else:
-                    t = cycles[n]
-                if t.is_output():
-                    outputs.add((t.expr, signal, n))
-        return outputs
+        representing all annotated outputs. The result is cached until annotations change.
+        """
+        cached = self._outputs
+        if cached is None or cached[0] != self.num_cycles:
+            outputs = frozenset(
+                (expr, signal, n)
+                for signal, entry in self._guide_dict.items()
+                for expr, n in entry.get_outputs(self.num_cycles)
+            )
+            cached = self._outputs = (self.num_cycles, outputs)
+        return cached[1]
@@ -18,6 +18,8 @@ class Translatable(ABC):
     Mixin to define common methods for translating to other representations.
     """
 
+    __slots__ = ()
+
     # @abstractmethod
     @staticmethod
     def from_json(fp):
@@ -1,7 +1,7 @@
 
 from abc import ABC
 from dataclasses import dataclass
-from typing import Tuple
+from typing import ClassVar, Dict, Optional, Tuple
 
 from .common import Translatable, TargetFormat
 
@@ -27,8 +27,28 @@ class Sort(Translatable, ABC):
 
 @dataclass(frozen=True)
 class BVSort(Sort):
+    """
+    A bitvector sort. Instances are interned by width, so `BVSort(n) is BVSort(n)`; this lets
+    comparisons of terms and tuples containing sorts succeed on identity alone.
+    """
     bitwidth: int
 
+    _interned: ClassVar[Dict[int, "BVSort"]] = {}
+
+    def __new__(cls, bitwidth=None):
+        # Non-int widths are left to fail the check in __post_init__ without being cached
+        if type(bitwidth) is not int:
+            return super().__new__(cls)
+        try:
+            return cls._interned[bitwidth]
+        except KeyError:
+            sort = super().__new__(cls)
+            cls._interned[bitwidth] = sort
+            return sort
+
+    def __reduce__(self):
+        return (BVSort, (self.bitwidth,))
+
     def __post_init__(self):
         assert isinstance(self.bitwidth, int), type(self.bitwidth)
 
@@ -56,6 +76,18 @@ class BVSort(Sort):
 
 @dataclass(frozen=True)
 class BoolSort(Sort):
+    """The boolean sort. This is a singleton."""
+
+    _instance: ClassVar[Optional["BoolSort"]] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        return (BoolSort, ())
+
     @property
     def bitwidth(self):
         return 1
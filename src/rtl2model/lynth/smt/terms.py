@@ -1,8 +1,9 @@
 
 from abc import ABC, ABCMeta, abstractmethod
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, fields
 from enum import Enum, EnumMeta, IntEnum, auto
 import json
+import operator
 from typing import Callable, Dict, Mapping, Optional, TypeVar, Union, List
 
 import cvc5 as pycvc5
@@ -152,6 +153,8 @@ class Term(Translatable, ABC):
     is undesired.
     """
 
+    __slots__ = ()
+
     def _binop_type_check(self, other, sext=False, zpad=True, cast_int=True) -> Tuple["Term", "Term"]:
         """
         Checks that two operands have the same sort.
@@ -629,6 +632,54 @@ class _TermMeta(ABCMeta, EnumMeta):
     pass
 
 
+def _cache_hash(cls):
+    """
+    Class decorator for frozen dataclass terms with subterms. The dataclass-generated hash
+    is computed once and stored in the instance's `_hash` slot, and `__eq__` compares hashes
+    before falling back to the (recursive) field-by-field comparison, so most unequal terms
+    are rejected without walking their subterms.
+
+    The cached hash is dropped when pickling, since string hashes differ between processes.
+    """
+    # Fields are read with a C-level getter rather than by calling the dataclass-generated
+    # methods, so deeply nested terms don't use up the recursion limit any faster than before
+    field_names = tuple(f.name for f in fields(cls))
+    get_fields = operator.attrgetter(*field_names)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            h = hash(get_fields(self))
+            object.__setattr__(self, "_hash", h)
+            return h
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        # Cached hashes are read directly, since a __hash__ call per level is comparatively slow
+        h_self = getattr(self, "_hash", None)
+        h_other = getattr(other, "_hash", None)
+        if (hash(self) if h_self is None else h_self) != (hash(other) if h_other is None else h_other):
+            return False
+        return get_fields(self) == get_fields(other)
+
+    def __getstate__(self):
+        return get_fields(self)
+
+    def __setstate__(self, state):
+        for name, value in zip(field_names, state):
+            object.__setattr__(self, name, value)
+
+    cls.__hash__ = __hash__
+    cls.__eq__ = __eq__
+    cls.__getstate__ = __getstate__
+    cls.__setstate__ = __setstate__
+    return cls
+
+
 @dataclass(frozen=True)
 class Variable(Term):
     """
@@ -775,8 +826,11 @@ class VarDecl(Translatable):
         raise NotImplementedError("cannot convert VarDecl to " + str(tgt))
 
 
+@_cache_hash
 @dataclass(frozen=True)
 class OpTerm(Term):
+    __slots__ = ("kind", "args", "_hash")
+
     kind: Kind
     args: Tuple[Term, ...]
 
@@ -1228,8 +1282,11 @@ class UFTerm(Term):
         raise NotImplementedError("cannot convert UFTerm to " + str(tgt))
 
 
+@_cache_hash
 @dataclass(frozen=True)
 class LambdaTerm(Term):
+    __slots__ = ("params", "body", "_hash")
+
     params: Tuple[Variable, ...]
     body: Term
 
@@ -1298,8 +1355,11 @@ class LambdaTerm(Term):
         #     self.body.to_uclid()
         raise NotImplementedError("cannot convert LambdaTerm to " + str(tgt))
 
+@_cache_hash
 @dataclass(frozen=True)
 class QuantTerm(Term):
+    __slots__ = ("kind", "bound_vars", "body", "_hash")
+
     kind: Kind
     bound_vars: Tuple[Variable, ...]
     body: Term
@@ -1352,11 +1412,14 @@ class QuantTerm(Term):
         raise NotImplementedError("cannot convert QuantTerm to " + str(tgt))
 
 
+@_cache_hash
 @dataclass(frozen=True)
 class ApplyUF(Term):
     """
     Term representing application of an uninterpreted function on the specified inputs.
     """
+    __slots__ = ("fun", "input_values", "_hash")
+
     fun: UFTerm
     # without making cvc5 unhappy
     input_values: Tuple[Term, ...]
@@ -1,7 +1,8 @@
-from collections import defaultdict
+from collections import Counter, defaultdict
 import enum
+import functools
 from dataclasses import dataclass, field
-import textwrap
+import itertools
 from typing import Collection, List, Dict, Optional, Tuple
 
 import rtl2model.lynth.smt as smt
@@ -38,7 +39,8 @@ class UFPlaceholder:
             params = self.params
         return self.name + "(" + ", ".join(str(p) for p in params) + ")"
 
-    def maybe_free_arg_var(self) -> Optional[smt.Variable]:
+    @functools.cached_property
+    def _free_arg_var(self) -> Optional[smt.Variable]:
         if not self.free_arg:
             return None
         # TODO determine width of free variable
@@ -46,17 +48,24 @@ class UFPlaceholder:
         # that bv3 may have been used in an 8-way case stmt or something
         return smt.Variable(f"__free_{self.name}", self.sort)
 
-    def get_ref(self) -> smt.Variable:
-        return smt.Variable(self.name, self.sort)
-
-    def to_ufterm(self) -> smt.UFTerm:
-        free_var = self.maybe_free_arg_var()
+    @functools.cached_property
+    def _ufterm(self) -> smt.UFTerm:
+        free_var = self._free_arg_var
         if free_var is not None:
             params = self.params + (free_var,)
         else:
             params = self.params
         return smt.UFTerm(self.name, self.sort, params)
 
+    def maybe_free_arg_var(self) -> Optional[smt.Variable]:
+        return self._free_arg_var
+
+    def get_ref(self) -> smt.Variable:
+        return smt.Variable(self.name, self.sort)
+
+    def to_ufterm(self) -> smt.UFTerm:
+        return self._ufterm
+
     def to_synthfun(self, grammar: Optional[smt.Grammar]) -> smt.SynthFun:
         free_var = self.maybe_free_arg_var()
         params = self.params
@@ -65,6 +74,72 @@ class UFPlaceholder:
         return smt.SynthFun(self.name, params, self.sort, grammar)
 
 
+_UCLID_MODULE_TMPL = """\
+module {name} {{
+{u_vars}
+{instances}
+    init {{
+{init_logic}
+{init_next}
+    }}
+
+    next {{
+        // Combinatorial logic
+{logic}
+        // Transition logic
+{next}
+        // Instance transitions
+{child_next}
+    }}
+}}"""
+"""Template for `Model.to_uclid`. Each block must already be indented."""
+
+_UCLID_INSTANCE_TMPL = """\
+instance {name} : {model}
+(
+{inputs}
+);"""
+"""Template for `Instance.to_uclid`. Each input binding must already be indented."""
+
+_PRETTY_INDENT = ' ' * 8
+
+
+def _pretty_block(items):
+    """
+    Formats the field values for `Model.pretty_str`, placing each item on its own line.
+    Returns an empty string if there are no items.
+    """
+    s = (",\n" + _PRETTY_INDENT).join(items)
+    return "\n" + _PRETTY_INDENT + s if s else ""
+
+
+def _append_indented(parts, s, prefix):
+    """
+    Appends `s` to `parts` with `prefix` added to the start of each line, skipping lines
+    that are only whitespace (like `textwrap.indent`).
+    """
+    if not prefix:
+        parts.append(s)
+        return
+    parts.extend(prefix + line if line.strip() else line for line in s.splitlines(True))
+
+
+class _ValidationFailed(Exception):
+    """Raised internally to stop `Model.validate` at the first error in fast mode."""
+
+
+def _references_var(term, var):
+    """Returns True if `var` appears anywhere within the expression tree `term`."""
+    found = False
+    def visitor(t):
+        nonlocal found
+        if isinstance(t, smt.Variable) and t == var:
+            found = True
+        return not found
+    term.preorder_visit_tree(visitor)
+    return found
+
+
 def _get_assignee_name(term):
     if isinstance(term, smt.Variable):
         return term.name
@@ -115,27 +190,48 @@ class Model:
     # === VALIDATION AND PROPERTIES ===
 
     def __post_init__(self):
-        assert isinstance(self.inputs, list)
-        assert isinstance(self.outputs, list)
-        assert isinstance(self.state, list)
-        assert isinstance(self.ufs, list)
-        for uf in self.ufs:
-            assert isinstance(uf, UFPlaceholder)
-        assert isinstance(self.logic, dict)
-        for _k, t in self.logic.items():
-            assert isinstance(t, smt.Term), t
-        assert isinstance(self.transition, dict)
-        for _k, t in self.transition.items():
-            assert isinstance(t, smt.Term), t
-        assert isinstance(self.instances, dict)
-        for i, m in self.instances.items():
-            assert isinstance(i, str), f"instance name {i} is not a str (was {type(i)})"
-            assert isinstance(m, Instance), f"value for instance {i} is not a Instance (was {type(m)})"
-        assert isinstance(self.init_values, dict)
-        for a in self.assertions:
-            assert a.is_bool_expr()
-        for a in self.assumptions:
-            assert a.is_bool_expr()
+        # Type checks on every field (and element) are compiled out under `python -O`
+        if __debug__:
+            assert isinstance(self.inputs, list)
+            assert isinstance(self.outputs, list)
+            assert isinstance(self.state, list)
+            assert isinstance(self.ufs, list)
+            for uf in self.ufs:
+                assert isinstance(uf, UFPlaceholder)
+            assert isinstance(self.logic, dict)
+            for _k, t in self.logic.items():
+                assert isinstance(t, smt.Term), t
+            assert isinstance(self.transition, dict)
+            for _k, t in self.transition.items():
+                assert isinstance(t, smt.Term), t
+            assert isinstance(self.instances, dict)
+            for i, m in self.instances.items():
+                assert isinstance(i, str), f"instance name {i} is not a str (was {type(i)})"
+                assert isinstance(m, Instance), f"value for instance {i} is not a Instance (was {type(m)})"
+            assert isinstance(self.init_values, dict)
+            for a in self.assertions:
+                assert a.is_bool_expr()
+            for a in self.assumptions:
+                assert a.is_bool_expr()
+        self._init_caches()
+
+    def _init_caches(self):
+        # Expressions in `logic` and `transition` that passed typecheck in the last `validate`
+        self._typechecked = set()
+
+    def __getstate__(self):
+        # Memoized results are not pickled, since they may not be valid in another process
+        state = self.__dict__.copy()
+        state.pop("_typechecked", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_caches()
+
+    def __repr__(self):
+        # The generated dataclass repr would render every expression; use `pretty_str` for that
+        return f"Model(name={self.name!r}, state={len(self.state)}, logic={len(self.logic)})"
 
     def copy(self):
         """
@@ -190,174 +286,194 @@ class Model:
         assert isinstance(assumption, smt.Term) and assumption.is_bool_expr()
         self.assumptions.append(assumption)
 
-    def validate(self):
+    def validate(self, fast=False, verbose=True):
         """
         Checks that all expressions are well-typed, variables are declared, etc.
         Returns `True` on success, `False` on failure.
 
+        If `fast` is set, validation stops at the first error found.
+        If `verbose` is set (the default), errors are printed as they are found.
+
+        A submodel that is instantiated more than once in the hierarchy is only validated once
+        per call.
+
         TODO more robust error handling
         """
+        return self._validate(fast, verbose, {})
+
+    def _validate(self, fast, verbose, results):
+        """
+        Implementation of `validate`. `results` maps the id of every model validated so far
+        during this call to its result.
+        """
         errs = []
         def report(s):
-            print(f"{self.name}:", s)
+            if verbose:
+                print(f"{self.name}:", s)
             errs.append(s)
-        def get_var_counts(l):
-            counts = defaultdict(lambda: 0) # maps variable name to appearances in l
-            for v in l:
-                counts[v.name] += 1
-            return counts
-        in_counts = get_var_counts(self.inputs)
-        out_counts = get_var_counts(self.outputs)
-        state_counts = get_var_counts(self.state)
-        uf_counts = get_var_counts(self.ufs + self.next_ufs)
+            if fast:
+                raise _ValidationFailed()
+        try:
+            self._validate_passes(report, fast, verbose, results)
+        except _ValidationFailed:
+            pass
+        ok = len(errs) == 0
+        results[id(self)] = ok
+        return ok
+
+    def _validate_passes(self, report, fast, verbose, results):
+        """
+        Runs each validation pass for `validate`, calling `report` on every error found.
+        If `fast` is set, `report` raises `_ValidationFailed` to stop at the first error.
+        """
+        # Maps variable name to number of appearances in each category of declaration
+        in_counts = Counter(v.name for v in self.inputs)
+        out_counts = Counter(v.name for v in self.outputs)
+        state_counts = Counter(v.name for v in self.state)
+        uf_counts = Counter(v.name for v in itertools.chain(self.ufs, self.next_ufs))
+        in_names = in_counts.keys()
+        out_names = out_counts.keys()
+        state_names = state_counts.keys()
+        uf_names = uf_counts.keys()
         # Zeroth pass: validate all instances and port bindings
+        # Maps id of each instantiated model to its input sorts
+        submodel_sorts = {}
         for subname, inst in self.instances.items():
-            if not inst.model.validate():
+            sub_ok = results.get(id(inst.model))
+            if sub_ok is None:
+                # Only the result matters if errors aren't printed
+                sub_ok = inst.model._validate(fast or not verbose, verbose, results)
+            needed_sorts = submodel_sorts.get(id(inst.model))
+            if needed_sorts is None:
+                needed_sorts = {i.name: i.sort for i in inst.model.inputs}
+                submodel_sorts[id(inst.model)] = needed_sorts
+            if not sub_ok:
                 report(f"validation error(s) in submodule {subname} (see above output)")
-            bound_names = [i.name for i in inst.inputs]
             bound_sorts = {i.name: t.sort for i, t in inst.inputs.items()}
-            needed_names = [i.name for i in inst.model.inputs]
-            needed_sorts = {i.name: i.sort for i in inst.model.inputs}
-            for missing_input in set(needed_names) - set(bound_names):
-                report(f"instance {subname} is missing binding for input {missing_input}")
-            for extra_input in set(bound_names) - set(needed_names):
-                report(f"instance {subname} has binding for unknown input {extra_input}")
             for name, sort in needed_sorts.items():
-                if name in bound_sorts and sort != bound_sorts[name]:
-                    report(f"instance {subname} has mismatched binding for input {name}: needed {sort}, got {bound_sorts[name]}")
+                bound_sort = bound_sorts.get(name)
+                if bound_sort is None:
+                    report(f"instance {subname} is missing binding for input {name}")
+                elif sort != bound_sort:
+                    report(f"instance {subname} has mismatched binding for input {name}: needed {sort}, got {bound_sort}")
+            for name in bound_sorts:
+                if name not in needed_sorts:
+                    report(f"instance {subname} has binding for unknown input {name}")
         # First pass: no variable is declared multiple times
         # TODO don't be stateful if isinstance(v, smt.Variable)!
-        for s, count in in_counts.items():
-            if "." in s:
-                report(f"input {s} cannot have . in its name")
-            if count > 1:
-                report(f"input {s} was declared multiple times")
-            if s in out_counts:
-                report(f"input {s} was also declared as an output")
-            if s in state_counts:
-                report(f"input {s} was also declared as a state variable")
-            if s in uf_counts:
-                report(f"input {s} was also declared as an uninterpreted function")
-        for s, count in out_counts.items():
-            if "." in s:
-                report(f"output {s} cannot have . in its name")
-            if count > 1:
-                report(f"output {s} was declared multiple times")
-            if s in state_counts:
-                report(f"output {s} was also declared as a state variable")
-            # if s in uf_counts:
-            #     report(f"output {s} was also declared as an uninterpreted function")
-        for s, count in state_counts.items():
-            if "." in s:
-                report(f"state variable {s} cannot have . in its name")
-            if count > 1:
-                report(f"state variable {s} was declared multiple times")
-            if s in uf_counts:
-                report(f"state variable {s} was also declared as an uninterpreted function")
-        for s, count in uf_counts.items():
-            if "." in s:
-                report(f"uninterpreted function {s} cannot have . in its name")
-            if count > 1:
-                report(f"uninterpreted function {s} was declared multiple times")
+        for category, counts in (
+            ("input", in_counts),
+            ("output", out_counts),
+            ("state variable", state_counts),
+            ("uninterpreted function", uf_counts),
+        ):
+            for s, count in counts.items():
+                if "." in s:
+                    report(f"{category} {s} cannot have . in its name")
+                if count > 1:
+                    report(f"{category} {s} was declared multiple times")
+        for s in in_names & out_names:
+            report(f"input {s} was also declared as an output")
+        for s in in_names & state_names:
+            report(f"input {s} was also declared as a state variable")
+        for s in in_names & uf_names:
+            report(f"input {s} was also declared as an uninterpreted function")
+        for s in out_names & state_names:
+            report(f"output {s} was also declared as a state variable")
+        # for s in out_names & uf_names:
+        #     report(f"output {s} was also declared as an uninterpreted function")
+        for s in state_names & uf_names:
+            report(f"state variable {s} was also declared as an uninterpreted function")
         # Second pass: all state have assigned expressions xor transition relations
         # and outputs have logic xor transition xor UF
         # and that inputs + UFs do NOT have declared logic
-        logic_and_next = {_get_assignee_name(v) for v in self.logic}
-        next_keys = set()
-        names = {_get_assignee_name(v) for v in self.transition}
-        next_keys.update(names)
-        logic_and_next.update(names)
-        for v in self.inputs:
+        logic_keys = frozenset(_get_assignee_name(v) for v in self.logic)
+        next_keys = frozenset(_get_assignee_name(v) for v in self.transition)
+        logic_and_next = logic_keys | next_keys
+        # Declared names were already collected (and deduplicated) by the first pass
+        for s in in_names:
             # TODO allow multiple assigns to different bit fields of the same wire?
-            if v.name in self.logic:
-                report(f"input variable {v.name} has illegal declared logic")
-            if v.name in next_keys:
-                report(f"input variable {v.name} has illegal declared transition relation")
-        for v in self.state:
-            if v.name not in logic_and_next:
-                report(f"state variable {v.name} has no declared logic or transition relation")
-        for v in self.outputs:
-            if v.name not in logic_and_next and v.name not in uf_counts:
-                report(f"output variable {v.name} has no declared logic, transition relation, or UF")
-        for v in self.ufs + self.next_ufs:
-            if v.name in self.logic:
-                report(f"uninterpreted function {v.name} has illegal declared logic")
-            if v.name in next_keys:
-                report(f"uninterpreted function {v.name} has illegal declared transition relation")
+            if s in logic_keys:
+                report(f"input variable {s} has illegal declared logic")
+            if s in next_keys:
+                report(f"input variable {s} has illegal declared transition relation")
+        for s in state_names:
+            if s not in logic_and_next:
+                report(f"state variable {s} has no declared logic or transition relation")
+        for s in out_names:
+            if s not in logic_and_next and s not in uf_names:
+                report(f"output variable {s} has no declared logic, transition relation, or UF")
+        for s in uf_names:
+            if s in logic_keys:
+                report(f"uninterpreted function {s} has illegal declared logic")
+            if s in next_keys:
+                report(f"uninterpreted function {s} has illegal declared transition relation")
         # nth pass: init values correspond to valid variables
         # TODO
         # nth pass: transition relations and expressions type check and are valid
+        # Terms are immutable, so an expression that typechecked once always will. The set is
+        # rebuilt from the current expressions so that replaced ones are not kept alive.
+        prev_typechecked = self._typechecked
+        typechecked = self._typechecked = set()
         for v, e in self.logic.items():
-            if not e.typecheck():
+            if e in prev_typechecked or e.typecheck():
+                typechecked.add(e)
+            else:
                 report(f"type error in logic for {v} (see above output)")
         for v, e in self.transition.items():
-            if not e.typecheck():
+            if e in prev_typechecked or e.typecheck():
+                typechecked.add(e)
+            else:
                 report(f"type error in transition logic for {v} (see above output)")
-        return len(errs) == 0
 
     # === STRING/FORMAT CONVERSIONS ===
 
     def pretty_str(self, indent_level=0):
-        # Weird things happen with escaped chars in f-strings
-        newline = '\n' + ' ' * 20
-        c_newline = "," + newline
-        if len(self.inputs) > 0:
-            input_block = newline + c_newline.join([str(a.get_decl()) for a in self.inputs])
-        else:
-            input_block = ""
-        if len(self.outputs) > 0:
-            output_block = newline + c_newline.join([str(a.get_decl()) for a in self.outputs])
-        else:
-            output_block = ""
-        if len(self.state) > 0:
-            state_block = newline + c_newline.join([str(a.get_decl()) for a in self.state])
-        else:
-            state_block = ""
-        if len(self.ufs) > 0:
-            uf_block = newline + c_newline.join([str(a) for a in self.ufs])
-        else:
-            uf_block = ""
-        if len(self.next_ufs) > 0:
-            next_uf_block = newline + c_newline.join([str(a) for a in self.next_ufs])
-        else:
-            next_uf_block = ""
-        if len(self.instances) > 0:
-            inst_block = newline + (newline + c_newline).join(str(m) + ':\n' + i.pretty_str(24) for m, i in self.instances.items())
-        else:
-            inst_block = ""
-        if len(self.logic) > 0:
-            logic_block = newline + c_newline.join(str(m) + ': ' + str(e) for m, e in self.logic.items())
-        else:
-            logic_block = ""
-        if len(self.transition) > 0:
-            next_block = newline + c_newline.join(str(m) + ': ' + str(e) for m, e in self.transition.items())
-        else:
-            next_block = ""
-        return textwrap.indent(textwrap.dedent(f"""\
-            Model {self.name} (generated via {str(self.generated_by)}):
-                inputs={input_block}
-                outputs={output_block}
-                state={state_block}
-                ufs={uf_block}
-                next_ufs={next_uf_block}
-                instances={inst_block}
-                logic={logic_block}
-                transition={next_block}
-            """
-        ), ' ' * indent_level)
+        parts = []
+        self._pretty_parts(parts, ' ' * indent_level)
+        return "".join(parts)
+
+    def _pretty_parts(self, parts, prefix):
+        """
+        Appends the lines of `pretty_str` to `parts`, each indented by `prefix`.
+        Submodels are written directly at their final indentation rather than being
+        re-indented once per level of nesting.
+        """
+        lines = [f"Model {self.name} (generated via {str(self.generated_by)}):"]
+        for label, block in (
+            ("inputs", _pretty_block(str(a.get_decl()) for a in self.inputs)),
+            ("outputs", _pretty_block(str(a.get_decl()) for a in self.outputs)),
+            ("state", _pretty_block(str(a.get_decl()) for a in self.state)),
+            ("ufs", _pretty_block(str(a) for a in self.ufs)),
+            ("next_ufs", _pretty_block(str(a) for a in self.next_ufs)),
+        ):
+            lines.append(f"    {label}={block}")
+        text = "\n".join(lines) + "\n    instances="
+        inst_prefix = prefix + ' ' * 12
+        for n, (m, i) in enumerate(self.instances.items()):
+            sep = "\n" if n == 0 else "\n" + _PRETTY_INDENT + ",\n"
+            _append_indented(parts, f"{text}{sep}{_PRETTY_INDENT}{m}:\n", prefix)
+            i._pretty_parts(parts, inst_prefix)
+            text = ""
+        lines = [text]
+        for label, block in (
+            ("logic", _pretty_block(f"{m}: {e}" for m, e in self.logic.items())),
+            ("transition", _pretty_block(f"{m}: {e}" for m, e in self.transition.items())),
+        ):
+            lines.append(f"    {label}={block}")
+        lines.append("")
+        _append_indented(parts, "\n".join(lines), prefix)
 
     def print(self):
         print(self.pretty_str())
 
     def to_uclid(self):
-        u_vars = []
-        def u_append(lst, prefix):
-            nonlocal u_vars
-            if len(lst) > 0:
-                u_vars.extend(prefix + " " + str(s.get_decl()) + ";" for s in lst)
-        u_append(self.inputs, "input")
-        u_append(self.outputs, "output")
-        u_append(self.state, "var")
+        # Every line is emitted with its final indentation within the module template
+        pad = ' ' * 4
+        body_pad = pad * 2
+        u_vars = [f"{pad}input {s.get_decl()};" for s in self.inputs]
+        u_vars.extend(f"{pad}output {s.get_decl()};" for s in self.outputs)
+        u_vars.extend(f"{pad}var {s.get_decl()};" for s in self.state)
         raise Exception("need to add UF placeholder vars")
         # Generate "__next" temp vars
         next_vars = {}
@@ -365,102 +481,80 @@ class Model:
             for v in transitions:
                 assert isinstance(v, smt.Variable), "uclid translation only works for variable (not array) assignments"
                 next_vars[v] = smt.Variable(v.name + "__next", v.sort)
-        u_append(next_vars.values(), "var")
-        if len(self.ufs) > 0:
-            u_vars.extend(s.to_ufterm().to_uclid() for s in self.ufs)
-        newline = ' ' * 16
-        u_vars_s = textwrap.indent("\n".join(u_vars), newline)
-        instances_s = textwrap.indent("\n".join(i.to_uclid(n) for n, i in self.instances.items()), newline)
-        def fix_var_refs(expr, prime_vars=False):
-            """
-            Replaces variable references to calls to uninterpreted functions when appropriate.
-            """
-            # trick: since we named uf params the same as module variables,
-            # we can just call on variable terms with those same names
-            ufs = {
-                smt.Variable(uf.name, uf.sort): smt.ApplyUF(uf.to_ufterm(), uf.params)
-                for uf in self.ufs
-            }
-            # TODO what if a UF takes in another UF as argument?
-            ufs.update({
-                smt.Variable(uf.name, uf.sort): smt.ApplyUF(uf.to_ufterm(), uf.params)
-                for uf in self.next_ufs
-            })
-            return expr.replace_vars(ufs).to_uclid(prime_vars=prime_vars)
-        init_logic_s = textwrap.indent(
-            "\n".join(f"{lhs.to_uclid()} = {fix_var_refs(rhs)};" for lhs, rhs in self.logic.items()),
-            newline + "    "
-        )
-        logic_s = textwrap.indent(
-            "\n".join(f"{lhs.to_uclid(prime_vars=True)} = {fix_var_refs(rhs, prime_vars=True)};" for lhs, rhs in self.logic.items()),
-            newline + "    "
-        )
-        if len(self.transition) > 0:
-            init_next_s = textwrap.indent(
-                "\n".join(
-                    f"{next_vars[lhs].to_uclid()} = {fix_var_refs(rhs)};\n"
-                    f"{lhs.to_uclid()} = {next_vars[lhs].to_uclid()};"
-                    for lhs, rhs in self.transition.items()
-                ),
-                newline + "    "
-            )
-            next_s = textwrap.indent(
-                "\n".join(
-                    f"{next_vars[lhs].to_uclid(prime_vars=True)} = {fix_var_refs(rhs, prime_vars=True)};\n"
-                    f"{lhs.to_uclid(prime_vars=True)} = {next_vars[lhs].to_uclid(prime_vars=True)};"
-                    for lhs, rhs in self.transition.items()
-                ),
-                newline + "    "
+        u_vars.extend(f"{pad}var {s.get_decl()};" for s in next_vars.values())
+        u_vars.extend(pad + s.to_ufterm().to_uclid() for s in self.ufs)
+        u_vars_s = "\n".join(u_vars)
+        # Instance declarations span multiple lines, so they are indented after the fact
+        instance_parts = []
+        _append_indented(instance_parts, "\n".join(i.to_uclid(n) for n, i in self.instances.items()), pad)
+        instances_s = "".join(instance_parts)
+        # trick: since we named uf params the same as module variables,
+        # we can just call on variable terms with those same names
+        # TODO what if a UF takes in another UF as argument?
+        uf_replacement = {
+            smt.Variable(uf.name, uf.sort): smt.ApplyUF(uf.to_ufterm(), uf.params)
+            for uf in itertools.chain(self.ufs, self.next_ufs)
+        }
+        # Each expression is emitted twice (for init and next), so variable references are
+        # replaced with UF calls once and the result is serialized both ways
+        init_logic_l = []
+        logic_l = []
+        for lhs, rhs in self.logic.items():
+            rhs = rhs.replace_vars(uf_replacement)
+            init_logic_l.append(f"{body_pad}{lhs.to_uclid()} = {rhs.to_uclid()};")
+            logic_l.append(f"{body_pad}{lhs.to_uclid(prime_vars=True)} = {rhs.to_uclid(prime_vars=True)};")
+        init_next_l = []
+        next_l = []
+        for lhs, rhs in self.transition.items():
+            rhs = rhs.replace_vars(uf_replacement)
+            next_var = next_vars[lhs]
+            init_next_l.append(
+                f"{body_pad}{next_var.to_uclid()} = {rhs.to_uclid()};\n"
+                f"{body_pad}{lhs.to_uclid()} = {next_var.to_uclid()};"
             )
-        else:
-            init_next_s = ""
-            next_s = ""
-        if len(self.instances) > 0:
-            child_next_s = textwrap.indent(
-                "\n".join(f"next({n});" for n in self.instances),
-                newline + "    "
+            next_l.append(
+                f"{body_pad}{next_var.to_uclid(prime_vars=True)} = {rhs.to_uclid(prime_vars=True)};\n"
+                f"{body_pad}{lhs.to_uclid(prime_vars=True)} = {next_var.to_uclid(prime_vars=True)};"
             )
-        else:
-            child_next_s = ""
+        init_logic_s = "\n".join(init_logic_l)
+        logic_s = "\n".join(logic_l)
+        init_next_s = "\n".join(init_next_l)
+        next_s = "\n".join(next_l)
+        child_next_s = "\n".join(f"{body_pad}next({n});" for n in self.instances)
         # TODO serialize assertions and assumptions
-        return textwrap.dedent(f"""\
-            module {self.name} {{
-{u_vars_s}
-{instances_s}
-                init {{
-{init_logic_s}
-{init_next_s}
-                }}
-
-                next {{
-                    // Combinatorial logic
-{logic_s}
-                    // Transition logic
-{next_s}
-                    // Instance transitions
-{child_next_s}
-                }}
-            }}""")
-
-    def get_all_defined_models(self, *, _submodel_list=None, _visited_submodel_names=None) -> List["Model"]:
+        return _UCLID_MODULE_TMPL.format(
+            name=self.name,
+            u_vars=u_vars_s,
+            instances=instances_s,
+            init_logic=init_logic_s,
+            init_next=init_next_s,
+            logic=logic_s,
+            next=next_s,
+            child_next=child_next_s,
+        )
+
+    def get_all_defined_models(self) -> List["Model"]:
         """
-        Recursively gets a list of all `Model`s (including itself) that are subinstances of this
-        `Model`.
+        Gets a list of all `Model`s (including itself) that are subinstances of this `Model`.
 
         The resulting list will be sorted in DFS post-order, meaning the deepest submodule will be
         the first element, and this module will be last.
         """
-        submodel_list = [] if _submodel_list is None else _submodel_list
-        visited_submodel_names = set() if _visited_submodel_names is None else _visited_submodel_names
-        for i in self.instances.values():
-            if i.model.name not in visited_submodel_names:
-                i.model.get_all_defined_models(
-                    _submodel_list=submodel_list,
-                    _visited_submodel_names=visited_submodel_names
-                )
-        # DFS postorder traversal
-        submodel_list.append(self)
-        visited_submodel_names.add(self.name)
+        submodel_list = []
+        visited_submodel_names = set()
+        # DFS postorder traversal with an explicit stack, so deep hierarchies don't hit the
+        # recursion limit; each entry holds a model and an iterator over its remaining instances
+        stack = [(self, iter(self.instances.values()))]
+        while stack:
+            model, children = stack[-1]
+            for i in children:
+                if i.model.name not in visited_submodel_names:
+                    stack.append((i.model, iter(i.model.instances.values())))
+                    break
+            else:
+                stack.pop()
+                submodel_list.append(model)
+                visited_submodel_names.add(model.name)
         return submodel_list
 
     def to_uclid_with_children(self) -> str:
@@ -834,59 +928,77 @@ class Model:
         raise KeyError(f"cannot case split on {var_name}: no such input or state variable")
 
     def _case_split_input(self, input_var: smt.Variable, possible_values: Collection[int]):
-        inputs = self.inputs[:]
-        inputs.remove(input_var)
+        # input_var is the object found in self.inputs by case_split, so compare by identity
+        inputs = [v for v in self.inputs if v is not input_var]
         return self._do_case_split(input_var, inputs, self.state, possible_values)
 
     def _case_split_var(self, state_var: smt.Variable, possible_values: List[int]):
-        state = self.state[:]
-        state.remove(state_var)
+        state = [v for v in self.state if v is not state_var]
         return self._do_case_split(state_var, self.inputs, state, possible_values)
 
     def _do_case_split(self, split_var, inputs, state, possible_values):
         # module/instance suffixes corresponding to possible_values
         varname = split_var.name
+        is_bool = split_var.is_bool_expr()
+        bw = split_var.c_bitwidth()
         if possible_values == (True, False):
             suffixes = [f"{varname}__TRUE", f"{varname}__FALSE"]
         else:
-            suffixes = [f"{varname}__{n:0{split_var.c_bitwidth()}b}" for n in possible_values]
+            suffixes = [f"{varname}__{n:0{bw}b}" for n in possible_values]
+        # Constant terms corresponding to possible_values
+        if is_bool:
+            consts = [smt.BoolConst.T if n else smt.BoolConst.F for n in possible_values]
+        else:
+            consts = [smt.BVConst(n, bw) for n in possible_values]
         instances = {}
         inst_names = [f"_{self.name}__{suffix}_inst" for suffix in suffixes]
-        for i, cs_value in enumerate(possible_values):
-            if split_var.is_bool_expr():
-                cs_value_t = smt.BoolConst.T if cs_value else smt.BoolConst.F
-            else:
-                cs_value_t = smt.BVConst(cs_value, split_var.c_bitwidth())
-            bindings = {i: i for i in inputs}
+        outputs = self.outputs
+        ufs = self.ufs
+        # Expressions that don't reference split_var are the same for every split value,
+        # so they are only optimized once and shared between the generated models
+        inst_items = [
+            (name, inst.model, [(v, t, _references_var(t, split_var)) for v, t in inst.inputs.items()])
+            for name, inst in self.instances.items()
+        ]
+        logic_items = [
+            (k, t, None if _references_var(t, split_var) else t.optimize())
+            for k, t in self.logic.items()
+        ]
+        transition_items = [
+            (k, t, None if _references_var(t, split_var) else t.optimize())
+            for k, t in self.transition.items()
+        ]
+        for i, cs_value_t in enumerate(consts):
+            replacement = {split_var: cs_value_t}
+            bindings = {v: v for v in inputs}
             new_model = Model(
                 name=f"_{self.name}__{suffixes[i]}",
                 inputs=inputs,
-                outputs=self.outputs,
+                outputs=outputs,
                 state=state,
-                ufs=self.ufs,
+                ufs=ufs,
                 instances={
                     name: Instance(
                         # Rewrite expressions for all input bindings
-                        inst.model,
-                        {
-                            v: t.replace_vars({split_var: cs_value_t})
-                            for v, t in inst.inputs.items()
-                        }
+                        model,
+                        {v: t.replace_vars(replacement) if has_var else t for v, t, has_var in input_items}
                     )
-                    for name, inst in self.instances.items()
+                    for name, model, input_items in inst_items
                 },
                 # TODO may need to replace LHS of assignments too? in case of indexing and stuff
                 logic={
-                    k: t.replace_vars({split_var: cs_value_t}).optimize() for k, t in self.logic.items()
+                    k: t.replace_vars(replacement).optimize() if t_opt is None else t_opt
+                    for k, t, t_opt in logic_items
                 },
                 transition={
-                    k: t.replace_vars({split_var: cs_value_t}).optimize() for k, t in self.transition.items()
+                    k: t.replace_vars(replacement).optimize() if t_opt is None else t_opt
+                    for k, t, t_opt in transition_items
                 },
                 generated_by=GeneratedBy.CASE_SPLIT,
             )
             new_model = new_model.eliminate_dead_code()
             instances[inst_names[i]] = Instance(new_model, bindings)
-        if split_var.is_bool_expr():
+        if is_bool:
             new_logic = {
                 o: split_var.ite(
                     smt.Variable(inst_names[0] + "." + o.name, o.sort),
@@ -925,6 +1037,8 @@ class Instance:
     Output bindings are specified only by the parent module.
     """
 
+    __slots__ = ("model", "inputs")
+
     model: Model
     inputs: Dict[smt.Variable, smt.Term]
     """
@@ -933,34 +1047,29 @@ class Instance:
     """
 
     def __post_init__(self):
-        assert isinstance(self.model, Model)
-        assert isinstance(self.inputs, dict), self.inputs
-        for k, v in self.inputs.items():
-            assert isinstance(k, smt.Variable)
-            assert isinstance(v, smt.Term)
+        if __debug__:
+            assert isinstance(self.model, Model)
+            assert isinstance(self.inputs, dict), self.inputs
+            for k, v in self.inputs.items():
+                assert isinstance(k, smt.Variable)
+                assert isinstance(v, smt.Term)
 
     def pretty_str(self, indent_level=0):
-        newline = '\n' + ' ' * 16
-        c_newline = "," + newline
+        parts = []
+        self._pretty_parts(parts, ' ' * indent_level)
+        return "".join(parts)
+
+    def _pretty_parts(self, parts, prefix):
+        """Appends the lines of `pretty_str` to `parts`, each indented by `prefix`."""
         if len(self.inputs) > 0:
-            input_block = newline + c_newline.join(str(v) + ": " + str(e) for v, e in self.inputs.items())
+            input_block = "\n    " + ",\n    ".join(f"{v}: {e}" for v, e in self.inputs.items())
         else:
-            input_block = newline
-        # maybe there's a cleaner way to do this f string :)
-        return textwrap.indent(textwrap.dedent(f"""\
-            input_bindings={input_block}
-            model=
-{self.model.pretty_str(16)}"""),
-            ' ' * indent_level
-        )
+            input_block = "\n"
+        _append_indented(parts, f"input_bindings={input_block}\nmodel=\n", prefix)
+        self.model._pretty_parts(parts, prefix + ' ' * 4)
 
     def to_uclid(self, instance_name):
-        newline = ",\n" + (' ' * 16)
-        i_lines = (' ' * 16) + newline.join(
-            f"{lhs.name} : ({rhs.to_uclid()})" for lhs, rhs in self.inputs.items()
+        i_lines = ",\n".join(
+            f"    {lhs.name} : ({rhs.to_uclid()})" for lhs, rhs in self.inputs.items()
         )
-        return textwrap.dedent(f"""\
-            instance {instance_name} : {self.model.name}
-            (
-{i_lines}
-            );""")
+        return _UCLID_INSTANCE_TMPL.format(name=instance_name, model=self.model.name, inputs=i_lines)
@@ -261,108 +261,109 @@ class ModelBuilder(ABC):
         sampled_vars = {v: smt.bool_variable("__sampled_" + v.name) for v in self.input_vars + self.output_refs}
         out_vars = {v: v.add_prefix("__hypothesis_") for v in self.output_refs}
         out_exprs = {}
+        # Pairs of (qualified path, variable) for all indices of all signals, which are the
+        # same on every cycle
+        # TODO convert these into index expressions if necessary
+        qp_pairs = [
+            (qp, smt.bv_variable(q2b(qp), get_width(qp)))
+            for signal in guidance.signals
+            for qp in signal.get_all_qp_instances()
+        ]
         for stepnum in range(guidance.num_cycles):
             itercond = ctr.op_eq(ctr_values[stepnum])
             assumes = []
             asserts = []
-            for signal in guidance.signals:
-                # Iterate over all indices for vectors
-                for qp in signal.get_all_qp_instances():
-                    # TODO convert this into an index expression if necessary
-                    qp_var = smt.bv_variable(q2b(qp), get_width(qp))
-                    atype = guidance.get_annotation_at(qp, stepnum)
-                    if atype is None or atype.is_dont_care():
-                        continue
-                    bounds = atype.bounds
-                    qp_vars = []
-                    if bounds:
-                        for b in bounds:
-                            qp_vars.append(qp_var[b[0]:b[1]])
+            for qp, qp_var in qp_pairs:
+                atype = guidance.get_annotation_at(qp, stepnum)
+                if atype is None or atype.is_dont_care():
+                    continue
+                bounds = atype.bounds
+                qp_vars = []
+                if bounds:
+                    for b in bounds:
+                        qp_vars.append(qp_var[b[0]:b[1]])
+                else:
+                    qp_vars = [qp_var]
+                for qp_var in qp_vars:
+                    if atype.is_assume():
+                        # Add assume statement
+                        constval = smt.BVConst(signal_values[stepnum][qp], get_width(qp))
+                        if bounds:
+                            constval = constval[bounds[0]:bounds[1]].eval({})
+                        assumes.append(qp_var.op_eq(constval))
+                    elif atype.is_param():
+                        # Add new shadow register
+                        # TODO add comments to assumes somehow?
+                        lhs = atype.expr.replace_vars(shadow_param_map)
+                        if bounds:
+                            lhs = lhs[bounds[0]:bounds[1]]
+                        assumes.append(lhs.op_eq(qp_var))
+                    elif atype.is_output():
+                        # Assert output
+                        asserts.append(func_anno(atype, qp_var))
                     else:
-                        qp_vars = [qp_var]
-                    for qp_var in qp_vars:
-                        if atype.is_assume():
-                            # Add assume statement
-                            constval = smt.BVConst(signal_values[stepnum][qp], get_width(qp))
-                            if bounds:
-                                constval = constval[bounds[0]:bounds[1]].eval({})
-                            assumes.append(qp_var.op_eq(constval))
-                        elif atype.is_param():
-                            # Add new shadow register
-                            # TODO add comments to assumes somehow?
-                            lhs = atype.expr.replace_vars(shadow_param_map)
-                            if bounds:
-                                lhs = lhs[bounds[0]:bounds[1]]
-                            assumes.append(lhs.op_eq(qp_var))
-                        elif atype.is_output():
-                            # Assert output
-                            asserts.append(func_anno(atype, qp_var))
-                        else:
-                            raise TypeError(f"invalid annotation {atype}")
+                        raise TypeError(f"invalid annotation {atype}")
             ctr_cases.append((itercond, assumes, asserts))
 
         pred_cases_l = []
-        for signal in guidance.signals:
-            for qp in signal.get_all_qp_instances():
-                first = True
-                # TODO convert this into an index expression if necessary
-                qp_var = smt.bv_variable(q2b(qp), get_width(qp))
-                for cond, anno_list in guidance.get_predicated_annotations(qp).items():
-                    # Add condition
-                    if first:
-                        s = f"if ({cond.to_verilog_str()}) begin\n"
-                        first = False
-                    elif cond == smt.BoolConst.T:
-                        s = f"else begin\n"
-                    else:
-                        s = f"else if ({cond.to_verilog_str()}) begin\n"
-                    for anno in anno_list:
-                        if anno.is_dont_care():
-                            continue
-                        bounds = anno.bounds
-                        qp_expr = qp_var
-                        # Add assume/assert
-                        if anno.is_assume():
-                            s += f"    case ({ctr.to_verilog_str()})\n"
-                            # Add assume statements
-                            for cc in ctr_values:
-                                s += f"        {cc.to_verilog_str()}: begin\n"
-                                constval = smt.BVConst(signal_values[cc.val][qp], get_width(qp))
-                                if bounds:
-                                    for b in bounds:
-                                        c = constval[b[0]:b[1]].eval({})
-                                        e = qp_expr[b[0]:b[1]]
-                                        s += f"            assume ({e.op_eq(c).to_verilog_str()});\n"
-                                else:
-                                    s += f"            assume ({qp_expr.op_eq(constval).to_verilog_str()});\n"
-                                s += "        end\n"
-                            s += f"    endcase\n"
-                        elif anno.is_param():
-                            anno_var = anno.expr.get_vars()[0]
-                            sample_var = sampled_vars[anno_var]
-                            # TODO add comments to assumes somehow?
-                            lhs = anno.expr.replace_vars(shadow_param_map)
-                            s += f"    if (!{sample_var.to_verilog_str()}) begin\n"
+        for qp, qp_var in qp_pairs:
+            first = True
+            for cond, anno_list in guidance.get_predicated_annotations(qp).items():
+                # Add condition
+                if first:
+                    s = f"if ({cond.to_verilog_str()}) begin\n"
+                    first = False
+                elif cond == smt.BoolConst.T:
+                    s = f"else begin\n"
+                else:
+                    s = f"else if ({cond.to_verilog_str()}) begin\n"
+                for anno in anno_list:
+                    if anno.is_dont_care():
+                        continue
+                    bounds = anno.bounds
+                    qp_expr = qp_var
+                    # Add assume/assert
+                    if anno.is_assume():
+                        s += f"    case ({ctr.to_verilog_str()})\n"
+                        # Add assume statements
+                        for cc in ctr_values:
+                            s += f"        {cc.to_verilog_str()}: begin\n"
+                            constval = smt.BVConst(signal_values[cc.val][qp], get_width(qp))
                             if bounds:
                                 for b in bounds:
-                                    s += f"        assume ({lhs.op_eq(qp_expr[b[0]:b[1]]).to_verilog_str()});\n"
+                                    c = constval[b[0]:b[1]].eval({})
+                                    e = qp_expr[b[0]:b[1]]
+                                    s += f"            assume ({e.op_eq(c).to_verilog_str()});\n"
                             else:
-                                s += f"        assume ({lhs.op_eq(qp_expr).to_verilog_str()});\n"
-                            s += f"        {sample_var.to_verilog_str()} <= 1;\n"
-                            s += f"    end\n"
-                        elif anno.is_output():
-                            # Assert output
-                            # TODO allow for a more coherent mapping from synth funs to outputs
-                            anno_var = anno.expr.get_vars()[0]
-                            sample_var = sampled_vars[anno_var]
-                            s += f"    if (!{sample_var.to_verilog_str()}) begin\n"
-                            s += f"        assert ({func_anno(anno, qp_expr).to_verilog_str()});\n"
-                            s += f"        {sample_var.to_verilog_str()} <= 1;\n"
-                            s += f"    end\n"
+                                s += f"            assume ({qp_expr.op_eq(constval).to_verilog_str()});\n"
+                            s += "        end\n"
+                        s += f"    endcase\n"
+                    elif anno.is_param():
+                        anno_var = anno.expr.get_vars()[0]
+                        sample_var = sampled_vars[anno_var]
+                        # TODO add comments to assumes somehow?
+                        lhs = anno.expr.replace_vars(shadow_param_map)
+                        s += f"    if (!{sample_var.to_verilog_str()}) begin\n"
+                        if bounds:
+                            for b in bounds:
+                                s += f"        assume ({lhs.op_eq(qp_expr[b[0]:b[1]]).to_verilog_str()});\n"
                         else:
-                            raise TypeError(f"invalid annotation {anno}")
-                    s += "end"
-                    pred_cases_l.append(s)
+                            s += f"        assume ({lhs.op_eq(qp_expr).to_verilog_str()});\n"
+                        s += f"        {sample_var.to_verilog_str()} <= 1;\n"
+                        s += f"    end\n"
+                    elif anno.is_output():
+                        # Assert output
+                        # TODO allow for a more coherent mapping from synth funs to outputs
+                        anno_var = anno.expr.get_vars()[0]
+                        sample_var = sampled_vars[anno_var]
+                        s += f"    if (!{sample_var.to_verilog_str()}) begin\n"
+                        s += f"        assert ({func_anno(anno, qp_expr).to_verilog_str()});\n"
+                        s += f"        {sample_var.to_verilog_str()} <= 1;\n"
+                        s += f"    end\n"
+                    else:
+                        raise TypeError(f"invalid annotation {anno}")
+                s += "end"
+                pred_cases_l.append(s)
 
         shadow_decls = "\n".join(s.get_decl().to_verilog_str(is_reg=True, anyconst=True) for s in shadow_param_map.values())
         sampled_decls = "\n".join(s.get_decl(init_value=smt.BVConst(0, 1)).to_verilog_str(is_reg=True) for s in sampled_vars.values())
@@ -388,13 +389,12 @@ class ModelBuilder(ABC):
             sampled_decls + "\n" + \
             out_decls + "\n" + \
             out_assigns + "\n" + \
-            textwrap.dedent(f"""\
-
-            {ctr.get_decl(smt.BVConst(0, ctr_width)).to_verilog_str(is_reg=True)}
-            always @(posedge {clock_name}) begin
-                {ctr.to_verilog_str()} <= {ctr.to_verilog_str()} + 1;
-            end
-            """) + f"always @(posedge {clock_name}) begin\n" + \
+            "\n" + \
+            ctr.get_decl(smt.BVConst(0, ctr_width)).to_verilog_str(is_reg=True) + "\n" + \
+            f"always @(posedge {clock_name}) begin\n" + \
+            f"    {ctr.to_verilog_str()} <= {ctr.to_verilog_str()} + 1;\n" + \
+            "end\n" + \
+            f"always @(posedge {clock_name}) begin\n" + \
             set_assumes + "\n" + \
             textwrap.indent("\n".join(ctr_cases_l), "    ") + \
             "\n\n" + textwrap.indent("\n".join(pred_cases_l), "    ") + \
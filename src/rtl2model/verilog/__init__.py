@@ -14,7 +14,7 @@ import os
 import pickle
 import re
 import textwrap
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 import pyverilog
 from pyverilog.dataflow.dataflow_analyzer import VerilogDataflowAnalyzer
@@ -109,6 +109,8 @@ def verilog_to_model(
     PERF NOTE: at a cursory glance, it seems like most of the runtime is spent in yacc within
     pyverilog, so algorithmic improvements here probably won't help that much. Perhaps for
     models of multiple RTL modules, the same VerilogDataflowAnalyzer can be reused?
+    To generate several models from one design, call `parse_rtl` once and then `lower_to_model`
+    for each configuration.
     """
     # === ARGUMENT PROCESSING ===
     if pickle_path is not None and os.path.isfile(pickle_path):
@@ -116,17 +118,79 @@ def verilog_to_model(
         with open(pickle_path, "rb") as f:
             return pickle.load(f)
 
-    if important_signals is None:
-        important_signals = []
-    preserve_all_signals = len(important_signals) == 0
+    top_model = lower_to_model(
+        parse_rtl(verilog_path, top_name),
+        clock_pattern=clock_pattern,
+        important_signals=important_signals,
+        coi_conf=coi_conf,
+        inline_renames=inline_renames,
+        defined_modules=defined_modules,
+    )
+    if pickle_path is not None:
+        print("Creating pickle at", pickle_path)
+        with open(pickle_path, "wb") as f:
+            pickle.dump(top_model, f)
+    return top_model
+
+
+@dataclass(frozen=True, eq=False)
+class ParsedDesign:
+    """
+    The output of pyverilog's parser and dataflow analysis for a design, as produced by `parse_rtl`.
+
+    A `ParsedDesign` is not modified by `lower_to_model`, so it can be reused to generate models
+    with different important signals or COI configurations without re-parsing.
+    """
+
+    top_name: str
+    terms: Dict
+    """The term dictionary generated by pyverilog."""
+    binddict: Dict
+    """The assignment dictionary generated by pyverilog."""
+    instances: Tuple
+    """Pairs of (fully qualified instance name, module name) for every instance in the design."""
+
 
+def parse_rtl(verilog_path: str, top_name: str) -> ParsedDesign:
+    """
+    Runs pyverilog's parser and dataflow analysis on the design rooted at `top_name`.
+    Arguments are as described in `verilog_to_model`.
+
+    This is the expensive part of `verilog_to_model`; pass the result to `lower_to_model` to
+    produce a `Model`.
+    """
     PROFILE.push(Segment.PV_PARSE)
     analyzer = VerilogDataflowAnalyzer(verilog_path, top_name, noreorder=True)
     analyzer.generate()
-
-    terms = analyzer.getTerms()
-    binddict = analyzer.getBinddict()
+    parsed = ParsedDesign(
+        top_name,
+        analyzer.getTerms(),
+        analyzer.getBinddict(),
+        tuple(analyzer.getInstances()),
+    )
     PROFILE.pop()
+    return parsed
+
+
+def lower_to_model(
+    parsed: ParsedDesign,
+    clock_pattern: str="clk",
+    important_signals: Optional[List[str]]=None,
+    coi_conf=COIConf.NO_COI,
+    inline_renames=True,
+    defined_modules: Optional[List[Model]]=None,
+) -> Model:
+    """
+    Produces a `Model` for the top module of a design parsed by `parse_rtl`.
+    Arguments are as described in `verilog_to_model`.
+    """
+    top_name = parsed.top_name
+    terms = parsed.terms
+    binddict = parsed.binddict
+    # Copied, since names are qualified in place below
+    important_signals = [] if important_signals is None else list(important_signals)
+    preserve_all_signals = len(important_signals) == 0
+
     PROFILE.push(Segment.DF_TRAVERSE)
     all_signals = [str(t) for t in terms]
     clock_regex = re.compile(clock_pattern)
@@ -156,7 +220,7 @@ def verilog_to_model(
             for sub in m.get_all_defined_models():
                 # This loop includes m
                 submodules[sub.name] = sub
-    for inst_name, mod_name in analyzer.getInstances():
+    for inst_name, mod_name in parsed.instances:
         if str(inst_name) == top_name:
             continue
         instance_names[str(inst_name)] = mod_name
@@ -202,10 +266,6 @@ def verilog_to_model(
         inline_renames,
     )
     PROFILE.pop()
-    if pickle_path is not None:
-        print("Creating pickle at", pickle_path)
-        with open(pickle_path, "wb") as f:
-            pickle.dump(top_model, f)
     return top_model
 
 
@@ -0,0 +1,20 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--dump-models",
+        action="store_true",
+        help="pretty-print the models built by each test",
+    )
+
+
+@pytest.fixture(scope="session")
+def dump_model(pytestconfig):
+    """
+    Returns a function that prints a `rtl2model.model.Model` if pytest was run with
+    `--dump-models`, and does nothing otherwise.
+    """
+    if pytestconfig.getoption("--dump-models"):
+        return lambda m: m.print()
+    return lambda m: None
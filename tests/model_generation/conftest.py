@@ -0,0 +1,41 @@
+import dataclasses
+import functools
+
+import pytest
+
+from rtl2model.model import Model
+from rtl2model.verilog import parse_rtl, lower_to_model
+
+
+@pytest.fixture(scope="session")
+def parse():
+    """
+    Returns a drop-in replacement for `verilog_to_model` that only runs pyverilog once per
+    distinct (RTL, top module) pair. Each call still lowers the parsed design to a fresh `Model`,
+    so tests that elaborate the same RTL with different important signals or COI configurations
+    share the parse but not the result.
+
+    Parses are cached in memory for the session. Under pytest-xdist each worker has its own
+    cache; run with `--dist loadfile` so tests that share RTL land on the same worker.
+    """
+    cached_parse_rtl = functools.lru_cache(maxsize=128)(parse_rtl)
+
+    def parse(rtl, top_name, **kwargs):
+        return lower_to_model(cached_parse_rtl(rtl, top_name), **kwargs)
+    return parse
+
+
+@pytest.fixture(scope="session")
+def check_equiv():
+    """
+    Returns a function that asserts `model` equals `expected` and passes validation, replacing
+    the `assert model.validate(); assert model == expected` idiom. Fields are compared one at a
+    time, so on a mismatch pytest shows the differing values along with the field name.
+    """
+    compared_fields = [f.name for f in dataclasses.fields(Model) if f.compare]
+    def check_equiv(model, expected):
+        # Equality is checked first, since validating a model that doesn't match is wasted work
+        for f in compared_fields:
+            assert getattr(model, f) == getattr(expected, f), f
+        assert model.validate()
+    return check_equiv
@@ -12,7 +12,7 @@ class TestCaseSplit:
     Tests automatic case splitting of a model.
     """
 
-    def test_case_split_bool_input(self):
+    def test_case_split_bool_input(self, dump_model):
         """
         Splits a model on a boolean input.
 
@@ -63,7 +63,7 @@ class TestCaseSplit:
             },
         )
         print("=== ORIGINAL MODEL ===")
-        top.print()
+        dump_model(top)
         assert top.validate()
         gen = verilog_to_model(rtl, "top")
         assert gen == top
@@ -110,11 +110,11 @@ class TestCaseSplit:
         print("=== CASE SPLIT MODEL ===")
         assert cs_top.validate()
         alg_split = top.case_split("either")
-        alg_split.print()
+        dump_model(alg_split)
         alg_split.validate()
         assert alg_split == cs_top
 
-    def test_case_split_bv_state(self):
+    def test_case_split_bv_state(self, dump_model):
         """
         Splits a model on a bitvector state variable.
 
@@ -144,7 +144,7 @@ class TestCaseSplit:
             },
         )
         print("=== ORIGINAL MODEL ===")
-        top.print()
+        dump_model(top)
         assert top.validate()
         cs_top_00 = Model(
             "_top__v_t__00",
@@ -223,11 +223,11 @@ class TestCaseSplit:
         print("=== CASE SPLIT MODEL ===")
         assert cs_top.validate()
         alg_split = top.case_split("v_t")
-        alg_split.print()
+        dump_model(alg_split)
         assert alg_split.validate()
         assert alg_split == cs_top
 
-    def test_case_split_bv_clocked_state(self):
+    def test_case_split_bv_clocked_state(self, dump_model):
         """
         Tests case splitting on a variable that affects a clocked update in the
         model.
@@ -297,7 +297,7 @@ class TestCaseSplit:
         )
         assert cs_top.validate()
         alg_split = top.case_split("s_a")
-        alg_split.print()
+        dump_model(alg_split)
         assert alg_split == cs_top
 
     def test_case_split_stateful_instance(self):
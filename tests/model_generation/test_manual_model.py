@@ -1,3 +1,4 @@
+import pickle
 
 import pytest
 
@@ -17,6 +18,22 @@ class TestManualModel:
         a = smt.Variable("a", bv3)
         model = Model("top", inputs=[a], outputs=[a], logic={a: smt.BVConst(0, 3)})
         assert not model.validate()
+        assert not model.copy().validate(fast=True, verbose=False)
+
+    def test_validate_failure_reprinted(self, capsys):
+        """
+        Tests that a validation failure is reported on every verbose call.
+        """
+        bv3 = smt.BVSort(3)
+        a = smt.Variable("a", bv3)
+        model = Model("top", inputs=[a], outputs=[a], logic={a: smt.BVConst(0, 3)})
+        assert not model.validate()
+        first = capsys.readouterr().out
+        assert first
+        assert not model.validate(verbose=False)
+        assert not capsys.readouterr().out
+        assert not model.validate()
+        assert capsys.readouterr().out == first
 
     def test_error_no_logic(self):
         """
@@ -28,6 +45,92 @@ class TestManualModel:
         model = Model("top", state=[a])
         assert not model.validate()
 
+    def test_error_input_logic(self):
+        """
+        Validation on this model should fail because an input is assigned logic.
+        """
+        bv3 = smt.BVSort(3)
+        a = smt.Variable("a", bv3)
+        b = smt.Variable("b", bv3)
+        model = Model("top", inputs=[a], outputs=[b], logic={a: smt.BVConst(0, 3), b: a})
+        assert not model.validate()
+
+    def test_error_instance_bindings(self):
+        """
+        Validation on this model should fail because an instance is missing an input binding
+        and binds an input that does not exist.
+        """
+        bv3 = smt.BVSort(3)
+        a = smt.Variable("a", bv3)
+        b = smt.Variable("b", bv3)
+        sub = Model("sub", inputs=[a], outputs=[b], logic={b: a})
+        assert sub.validate()
+        model = Model(
+            "top",
+            inputs=[a],
+            outputs=[b],
+            instances={"sub_inst": Instance(sub, {b: a})},
+            logic={b: smt.Variable("sub_inst.b", bv3)},
+        )
+        assert not model.validate()
+
+    def test_validate_after_mutation(self):
+        """
+        Tests that validation reflects changes made to a model or its submodels after an
+        earlier successful validation, whether fields are mutated in place or reassigned.
+        """
+        bv3 = smt.BVSort(3)
+        a = smt.Variable("a", bv3)
+        b = smt.Variable("b", bv3)
+        sub = Model("sub", inputs=[a], outputs=[b], logic={b: a})
+        model = Model(
+            "top",
+            inputs=[a],
+            outputs=[b],
+            instances={"sub_inst": Instance(sub, {a: a}), "sub_inst2": Instance(sub, {a: a})},
+            logic={b: smt.Variable("sub_inst.b", bv3)},
+        )
+        assert model.validate()
+        sub.state.append(smt.Variable("c", bv3))
+        assert not sub.validate()
+        assert not model.validate()
+        sub.state = []
+        assert model.validate()
+        model.logic = {}
+        assert not model.validate()
+        model.logic = {b: smt.Variable("sub_inst.b", bv3)}
+        assert model.validate()
+        model.logic[a] = smt.BVConst(0, 3)
+        assert not model.validate()
+
+    def test_typecheck_cache_tracks_fields(self):
+        """
+        Tests that expressions are only remembered as typechecked while they are still
+        part of the model.
+        """
+        bv3 = smt.BVSort(3)
+        a = smt.Variable("a", bv3)
+        b = smt.Variable("b", bv3)
+        old_e = a + 1
+        model = Model("top", inputs=[a], outputs=[b], logic={b: old_e})
+        assert model.validate()
+        assert model._typechecked == {old_e}
+        new_e = a + 2
+        model.logic = {b: new_e}
+        assert model.validate()
+        assert model._typechecked == {new_e}
+
+    def test_pickle_drops_memoized_results(self):
+        bv3 = smt.BVSort(3)
+        a = smt.Variable("a", bv3)
+        b = smt.Variable("b", bv3)
+        model = Model("top", inputs=[a], outputs=[b], logic={b: a + 1})
+        assert model.validate()
+        restored = pickle.loads(pickle.dumps(model))
+        assert restored == model
+        assert len(restored._typechecked) == 0
+        assert restored.validate()
+
     def test_simple_model(self):
         bv3 = smt.BVSort(3)
         var = smt.Variable
@@ -81,7 +184,7 @@ class TestManualModel:
         )
         assert top.validate()
 
-    def test_model_flatten_state(self):
+    def test_model_flatten_state(self, dump_model):
         """
         Tests pushing the transition relations of a module into submodules.
         """
@@ -140,7 +243,7 @@ class TestManualModel:
         )
         assert exp_flattened.validate()
         assert actual_flattened.validate()
-        actual_flattened.print()
+        dump_model(actual_flattened)
         assert actual_flattened == exp_flattened
         assert not actual_flattened.instances["__logic__top_inst"].model.is_stateful
 
@@ -213,7 +316,7 @@ class TestManualModel:
         assert actual.validate()
         assert actual == expected
 
-    def test_model_dce_instance(self):
+    def test_model_dce_instance(self, dump_model):
         """
         Tests dead code elimination when a dependency goes through an instance.
         """
@@ -272,11 +375,11 @@ class TestManualModel:
             logic={s0: i0, s2: v("live.inner_o", bv2) + 1, top_o: s2},
         )
         actual = top.eliminate_dead_code()
-        actual.print()
+        dump_model(actual)
         assert actual.validate()
         assert actual == expected
 
-    def test_model_replace_uf(self):
+    def test_model_replace_uf(self, dump_model):
         """
         Tests replacing a UF in a model with a concrete function.
         """
@@ -332,6 +435,6 @@ class TestManualModel:
         )
         assert exp_filled.validate()
         actual = top.replace_mod_uf_transition("sub", "out", a + b)
-        actual.print()
+        dump_model(actual)
         assert actual.validate()
         assert actual == exp_filled
@@ -29,7 +29,7 @@ class TestModelToUclid:
     passes
     """
 
-    def test_model2ucl_simple(self):
+    def test_model2ucl_simple(self, dump_model):
         bv3 = smt.BVSort(3)
         var = smt.Variable
         i_a = var("i_a", bv3)
@@ -48,7 +48,7 @@ class TestModelToUclid:
             logic={o_a: var("uf_a", bv3) + s_a, o_b: var("uf_b", bv3) + s_b, s_a: i_a | i_b},
             transition={s_b: i_a[0].ite(i_a, s_b)}
         )
-        model.print()
+        dump_model(model)
         actual_ucl = model.to_uclid().strip()
         print(actual_ucl)
         # TODO how to get output to appear on same cycle in uclid?
@@ -4,9 +4,125 @@ import textwrap
 import pytest
 
 import rtl2model.lynth.smt as smt
-from rtl2model.verilog import verilog_to_model
 from rtl2model.model import Model, Instance, UFPlaceholder
 
+_RTL_SINGLE_NOIMP = textwrap.dedent("""\
+    module top(input clk, input should_inc, output [2:0] result);
+        reg [2:0] a;
+        wire [2:0] a_p1;
+        always @(posedge clk) begin
+            if (should_inc) begin
+                a = a_p1;
+            end
+        end
+        assign a_p1 = a + 3'h1;
+        assign result = ~a;
+    endmodule
+    """)
+
+_RTL_ALWAYS_STAR = textwrap.dedent("""\
+    module top(input clk, input in);
+        reg r0;
+        reg r1;
+        always @(posedge clk) begin
+            r0 = r0 | in;
+        end
+        always @* begin
+            r1 = r1 | in;
+        end
+    endmodule
+    """)
+
+_RTL_BV_INT_INDEX = textwrap.dedent("""\
+    module top(input clk, input rst, input i_inner, output o_inner);
+        reg [2:0] i_state;
+        always @(posedge clk) begin
+            if (rst) begin
+                i_state = 3'h0;
+            end else begin
+                i_state = i_inner | i_state;
+            end
+        end
+        assign o_inner = i_state[0];
+    endmodule
+    """)
+
+_RTL_BV_VAR_INDEX = textwrap.dedent("""\
+    module top(input clk, input bit, input [2:0] idx, output out);
+        reg [7:0] op;
+        always @(posedge clk) begin
+            op[idx] = bit; // Sets the idxth bit
+        end
+        assign out = op[idx];
+    endmodule
+    """)
+
+_RTL_WEIRD_BV_ASSIGNS = textwrap.dedent("""\
+    module top(input [3:0] in, output [1:0] out);
+        reg [1:0] s0;
+        reg [3:0] s1;
+        always @(posedge clk) begin
+            s1[2] = in[2];
+            s1[1:0] = s0[1:0];
+        end
+        assign {{out, s0}} = in;
+    endmodule
+    """)
+
+_RTL_CARRY_ADD = textwrap.dedent("""\
+    module top(input [3:0] a, input [3:0] b, output c, output [3:0] out);
+        assign {{c, out}} = a + b;
+    endmodule
+    """)
+
+_RTL_ONE_CHILD_MODULE = textwrap.dedent("""\
+    module inner(input clk, input rst, input i_inner, output o_inner);
+        reg i_state;
+        always @(posedge clk) begin
+            if (rst) begin
+                i_state = 3'h0;
+            end else begin
+                i_state = i_inner | i_state;
+            end
+        end
+        assign o_inner = i_state;
+    endmodule
+
+    module top(input clk, input rst, input i_top, output reg o_top);
+        reg i_top_last;
+        wire i_out_next;
+        inner sub(
+            .clk(clk),
+            .rst(rst),
+            .i_inner(i_top_last),
+            .o_inner(i_out_next)
+        );
+        always @(posedge clk) begin
+            i_top_last = i_top;
+            o_top = i_out_next;
+        end
+    endmodule
+    """)
+
+_RTL_ARRAY = textwrap.dedent("""
+    module top(
+        input clk,
+        input wen,
+        input [1:0] ra,
+        input [3:0] wdata,
+        output [3:0] rdata
+    );
+        reg [3:0] arr [0:2]; // 3 4-bit elements, indexed 0 through 2
+        always @(posedge clk) begin
+            if (wen) begin
+                arr[ra] <= wdata;
+            end
+        end
+        assign rdata = arr[ra];
+    endmodule
+    """)
+
+
 class TestVerilogParse:
     """
     Tests generation of Models from Verilog files.
@@ -21,7 +137,7 @@ class TestVerilogParse:
     when `tocode` is called, though this does not affect the actual dataflow graph.
     """
 
-    def test_verilog_single_noimp(self):
+    def test_verilog_single_noimp(self, parse, dump_model):
         """
         Tests model generation of a model from a single RTL module.
         No "important" values are specified. "_rn" signals for intermediate values
@@ -29,22 +145,9 @@ class TestVerilogParse:
 
         Rename inlining is off, meaning they should appear in the output.
         """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input should_inc, output [2:0] result);
-                reg [2:0] a;
-                wire [2:0] a_p1;
-                always @(posedge clk) begin
-                    if (should_inc) begin
-                        a = a_p1;
-                    end
-                end
-                assign a_p1 = a + 3'h1;
-                assign result = ~a;
-            endmodule
-            """
-        )
-        model = verilog_to_model(rtl, "top", inline_renames=False)
-        model.print()
+        rtl = _RTL_SINGLE_NOIMP
+        model = parse(rtl, "top", inline_renames=False)
+        dump_model(model)
         bv3 = smt.BVSort(3)
         var = smt.Variable
         a = var("a", bv3)
@@ -65,26 +168,15 @@ class TestVerilogParse:
                 transition={a: should_inc.ite(rn_a, a)},
             )
 
-    def test_verilog_always_star(self):
+    def test_verilog_always_star(self, parse, dump_model):
         """
         Tests that dependencies from always @* blocks are placed in the correct cycle.
 
         Also implicitly tests inlining of "rename" variables.
         """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input in);
-                reg r0;
-                reg r1;
-                always @(posedge clk) begin
-                    r0 = r0 | in;
-                end
-                always @* begin
-                    r1 = r1 | in;
-                end
-            endmodule
-            """)
-        model = verilog_to_model(rtl, "top", inline_renames=True)
-        model.print()
+        rtl = _RTL_ALWAYS_STAR
+        model = parse(rtl, "top", inline_renames=True)
+        dump_model(model)
         in_ = smt.bool_variable("in")
         r0 = smt.bool_variable("r0")
         r1 = smt.bool_variable("r1")
@@ -97,27 +189,14 @@ class TestVerilogParse:
                 transition={r0: r0 | in_}
             )
 
-    def test_verilog_bv_int_index(self):
+    def test_verilog_bv_int_index(self, parse, dump_model):
         """
         Tests behavior of bitvector indexing.
         This also indirectly tests behavior of bitvector width checking.
         """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input rst, input i_inner, output o_inner);
-                reg [2:0] i_state;
-                always @(posedge clk) begin
-                    if (rst) begin
-                        i_state = 3'h0;
-                    end else begin
-                        i_state = i_inner | i_state;
-                    end
-                end
-                assign o_inner = i_state[0];
-            endmodule
-            """
-        )
-        model = verilog_to_model(rtl, "top")
-        model.print()
+        rtl = _RTL_BV_INT_INDEX
+        model = parse(rtl, "top")
+        dump_model(model)
         boolsort = smt.BoolSort()
         boolvar = smt.bool_variable
         rst = boolvar("rst")
@@ -139,22 +218,14 @@ class TestVerilogParse:
             },
             logic={o_inner: i_state[0]}
         )
-        expected.print()
+        dump_model(expected)
         assert model == expected
 
-    def test_verilog_bv_var_index(self):
+    def test_verilog_bv_var_index(self, parse, check_equiv, dump_model):
         """
         Tests indexing a bitvector with a variable.
         """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input bit, input [2:0] idx, output out);
-                reg [7:0] op;
-                always @(posedge clk) begin
-                    op[idx] = bit; // Sets the idxth bit
-                end
-                assign out = op[idx];
-            endmodule
-            """)
+        rtl = _RTL_BV_VAR_INDEX
         var = smt.Variable
         bit = var("bit", smt.BoolSort())
         idx = var("idx", smt.BVSort(3))
@@ -199,26 +270,15 @@ class TestVerilogParse:
             }
         )
         assert exp_model.validate()
-        actual = verilog_to_model(rtl, "top")
-        actual.print()
-        assert actual.validate()
-        assert actual == exp_model
+        actual = parse(rtl, "top")
+        dump_model(actual)
+        check_equiv(actual, exp_model)
 
-    def test_verilog_weird_bv_assigns(self):
+    def test_verilog_weird_bv_assigns(self, parse, check_equiv, dump_model):
         """
         Tests behavior for a few different mechanisms of bitvector assignment.
         """
-        rtl = textwrap.dedent("""\
-            module top(input [3:0] in, output [1:0] out);
-                reg [1:0] s0;
-                reg [3:0] s1;
-                always @(posedge clk) begin
-                    s1[2] = in[2];
-                    s1[1:0] = s0[1:0];
-                end
-                assign {{out, s0}} = in;
-            endmodule
-            """)
+        rtl = _RTL_WEIRD_BV_ASSIGNS
         v = smt.Variable
         in_ = v("in", smt.BVSort(4))
         out = v("out", smt.BVSort(2))
@@ -238,22 +298,17 @@ class TestVerilogParse:
                 s1[1:0]: s0[1:0],
             }
         )
-        exp_model.print()
+        dump_model(exp_model)
         assert exp_model.validate()
-        actual = verilog_to_model(rtl, "top")
-        actual.print()
-        assert actual.validate()
-        assert actual == exp_model
+        actual = parse(rtl, "top")
+        dump_model(actual)
+        check_equiv(actual, exp_model)
 
-    def test_verilog_carry_add(self):
+    def test_verilog_carry_add(self, parse, check_equiv, dump_model):
         """
         Tests weird bitvector casting stuff that happens in a carry addition idiom.
         """
-        rtl = textwrap.dedent("""\
-            module top(input [3:0] a, input [3:0] b, output c, output [3:0] out);
-                assign {{c, out}} = a + b;
-            endmodule
-            """)
+        rtl = _RTL_CARRY_ADD
         bv4 = smt.BVSort(4)
         v = smt.Variable
         a = v("a", bv4)
@@ -270,41 +325,12 @@ class TestVerilogParse:
             }
         )
         assert exp_model.validate()
-        actual = verilog_to_model(rtl, "top")
-        actual.print()
-        assert actual.validate()
-        assert actual == exp_model
-
-    def test_verilog_one_child_module(self):
-        rtl = textwrap.dedent("""\
-            module inner(input clk, input rst, input i_inner, output o_inner);
-                reg i_state;
-                always @(posedge clk) begin
-                    if (rst) begin
-                        i_state = 3'h0;
-                    end else begin
-                        i_state = i_inner | i_state;
-                    end
-                end
-                assign o_inner = i_state;
-            endmodule
+        actual = parse(rtl, "top")
+        dump_model(actual)
+        check_equiv(actual, exp_model)
 
-            module top(input clk, input rst, input i_top, output reg o_top);
-                reg i_top_last;
-                wire i_out_next;
-                inner sub(
-                    .clk(clk),
-                    .rst(rst),
-                    .i_inner(i_top_last),
-                    .o_inner(i_out_next)
-                );
-                always @(posedge clk) begin
-                    i_top_last = i_top;
-                    o_top = i_out_next;
-                end
-            endmodule
-            """
-        )
+    def test_verilog_one_child_module(self, parse, check_equiv, dump_model):
+        rtl = _RTL_ONE_CHILD_MODULE
         # TODO specifying important_signals for children
         var = smt.Variable
         boolsort = smt.BoolSort()
@@ -339,45 +365,15 @@ class TestVerilogParse:
             instances={"sub": Instance(exp_submodel, {rst: rst, i_inner: i_top_last})},
         )
         assert exp_top.validate()
-        model = verilog_to_model(rtl, "top")
-        model.print()
+        model = parse(rtl, "top")
+        dump_model(model)
         submodel = model.instances["sub"].model
-        submodel.print()
-        assert submodel.validate()
-        assert submodel == exp_submodel
-        assert model.validate()
-        assert model == exp_top
+        dump_model(submodel)
+        check_equiv(submodel, exp_submodel)
+        check_equiv(model, exp_top)
 
-    def test_verilog_substitute_child(self):
-        rtl = textwrap.dedent("""\
-            module inner(input clk, input rst, input i_inner, output o_inner);
-                reg i_state;
-                always @(posedge clk) begin
-                    if (rst) begin
-                        i_state = 3'h0;
-                    end else begin
-                        i_state = i_inner | i_state;
-                    end
-                end
-                assign o_inner = i_state;
-            endmodule
-
-            module top(input clk, input rst, input i_top, output reg o_top);
-                reg i_top_last;
-                wire i_out_next;
-                inner sub(
-                    .clk(clk),
-                    .rst(rst),
-                    .i_inner(i_top_last),
-                    .o_inner(i_out_next)
-                );
-                always @(posedge clk) begin
-                    i_top_last = i_top;
-                    o_top = i_out_next;
-                end
-            endmodule
-            """
-        )
+    def test_verilog_substitute_child(self, parse, check_equiv, dump_model):
+        rtl = _RTL_ONE_CHILD_MODULE
         var = smt.Variable
         boolsort = smt.BoolSort()
         rst = var("rst", boolsort)
@@ -406,47 +402,29 @@ class TestVerilogParse:
             instances={"sub": Instance(inner_def, {rst: rst, i_inner: i_top_last})},
         )
         assert exp_top.validate()
-        model = verilog_to_model(rtl, "top", defined_modules=[inner_def])
-        model.print()
+        model = parse(rtl, "top", defined_modules=[inner_def])
+        dump_model(model)
         submodel = model.instances["sub"].model
         assert submodel == inner_def
-        assert model.validate()
-        assert model == exp_top
+        check_equiv(model, exp_top)
 
-    def test_verilog_array(self):
+    def test_verilog_array(self, parse, check_equiv, dump_model):
         """
         Tests parsing of verilog arrays.
         """
-        rtl = textwrap.dedent("""
-            module top(
-                input clk,
-                input wen,
-                input [1:0] ra,
-                input [3:0] wdata,
-                output [3:0] rdata
-            );
-                reg [3:0] arr [0:2]; // 3 4-bit elements, indexed 0 through 2
-                always @(posedge clk) begin
-                    if (wen) begin
-                        arr[ra] <= wdata;
-                    end
-                end
-                assign rdata = arr[ra];
-            endmodule
-            """)
-        model = verilog_to_model(rtl, "top")
-        model.print()
+        rtl = _RTL_ARRAY
+        model = parse(rtl, "top")
+        dump_model(model)
         wdata = smt.Variable("wdata", smt.BVSort(4))
         wen = smt.Variable("wen", smt.BoolSort())
         reg = smt.Variable("ra", smt.BVSort(2))
         arr = smt.Variable("arr", smt.ArraySort(smt.BVSort(2), smt.BVSort(4)))
         rdata = smt.Variable("rdata", smt.BVSort(4))
-        assert model.validate()
-        assert model == Model(
+        check_equiv(model, Model(
             "top",
             inputs=[wen, reg, wdata],
             outputs=[rdata],
             state=[arr],
             logic={rdata: arr[reg]},
             transition={arr[reg]: wen.ite(wdata, arr[reg])},
-        )
+        ))
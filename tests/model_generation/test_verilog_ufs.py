@@ -4,160 +4,146 @@ import textwrap
 import pytest
 
 import rtl2model.lynth.smt as smt
-from rtl2model.verilog import verilog_to_model, COIConf
+from rtl2model.verilog import COIConf
 from rtl2model.model import Model, Instance, UFPlaceholder
 
+_RTL_INC_AB = textwrap.dedent("""\
+    module top(input clk, input should_inc, output [2:0] result);
+        reg [2:0] a;
+        reg [2:0] b;
+        wire [2:0] a_p1;
+        wire [2:0] b_p1;
+        always @(posedge clk) begin
+            if (should_inc) begin
+                a = a_p1;
+                b = b_p1;
+            end
+        end
+        assign a_p1 = a + 3'h1;
+        assign b_p1 = b + 3'h1;
+        assign result = ~a | ~b;
+    endmodule
+    """)
+
+# Signals of _RTL_INC_AB, shared by the tests that elaborate it
+_BV3 = smt.BVSort(3)
+_A = smt.Variable("a", _BV3)
+_A_P1 = smt.Variable("a_p1", _BV3)
+_B = smt.Variable("b", _BV3)
+_B_P1 = smt.Variable("b_p1", _BV3)
+_SHOULD_INC = smt.Variable("should_inc", smt.BoolSort())
+_RESULT = smt.Variable("result", _BV3)
+_INC_AB_COUNTERS = {"a": (_A, _A_P1), "b": (_B, _B_P1)}
+
+_RTL_SINGLE_IMP_UF_COI_TEMPORAL_STATE = textwrap.dedent("""\
+    module top(input clk, input [1:0] in, input [1:0] ignore, output [1:0] out);
+        reg [1:0] a;
+        reg [1:0] b;
+        reg [1:0] c;
+        always @(posedge clk) begin
+            a <= in + 1;
+            c <= b;
+        end
+        assign b = a & ignore;
+        assign out = c;
+    endmodule
+    """)
+
+_RTL_NESTED_CHILD = textwrap.dedent("""
+    module inner2(input clk, input [3:0] value, output [3:0] o);
+        reg [3:0] state;
+        always @(posedge clk) begin
+            state = value + 4'h1;
+        end
+        assign o = state ^ 4'b1111;
+    endmodule
+
+    module inner1(input clk, input [3:0] value, output [3:0] o);
+        reg [3:0] state;
+        wire [3:0] inner_s;
+        inner2 inst(
+            .value(value),
+            .o(inner_s)
+        );
+        always @(posedge clk) begin
+            state = inner_s ^ value;
+        end
+        assign o = state | 4'b110;
+    endmodule
+
+    module top(input clk, input [3:0] value, output [3:0] o);
+        reg [3:0] state;
+        wire [3:0] inner_s;
+        inner1 inst(
+            .value(state),
+            .o(inner_s)
+        );
+        always @(posedge clk) begin
+            state = inner_s & value;
+        end
+        assign o = inner_s;
+    endmodule
+    """)
+
+
 class TestVerilogUfs:
     """
     Tests verilog parsing with various cone-of-influence behaviors to
     replace hardware signals by uninterpreted functions.
     """
 
-    def test_verilog_single_imp_no_coi(self):
+    @pytest.mark.parametrize("coi_conf", [COIConf.NO_COI, COIConf.UF_ARGS_COI, COIConf.KEEP_COI])
+    @pytest.mark.parametrize("kept", ["b", "a"])
+    def test_verilog_single_imp_coi(self, parse, check_equiv, dump_model, coi_conf, kept):
         """
-        Tests generation of a model from a single RTL module with specified important signals.
-        `coi_conf` is `NO_COI`, meaning non-important signals are 1-arity UFs with a single argument
-        for degrees of freedom.
+        Tests generation of a model from a single RTL module with specified important signals,
+        where only one of the two counters (`kept`) is important. The other is elided according
+        to `coi_conf`:
+        - `NO_COI`: non-important signals are 1-arity UFs with a single argument for degrees of
+          freedom.
+        - `UF_ARGS_COI`: non-important signals are replaced with uninterpreted functions. Unlike
+          `NO_COI`, these UF terms have important arguments in their COI as arguments.
+        - `KEEP_COI`: any signal in the COI of an important signal is kept.
         """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input should_inc, output [2:0] result);
-                reg [2:0] a;
-                reg [2:0] b;
-                wire [2:0] a_p1;
-                wire [2:0] b_p1;
-                always @(posedge clk) begin
-                    if (should_inc) begin
-                        a = a_p1;
-                        b = b_p1;
-                    end
-                end
-                assign a_p1 = a + 3'h1;
-                assign b_p1 = b + 3'h1;
-                assign result = ~a | ~b;
-            endmodule
-            """)
-        bv3 = smt.BVSort(3)
-        var = smt.Variable
-        model_no_a = verilog_to_model(rtl, "top", important_signals=["should_inc", "b", "b_p1", "result"])
-        model_no_a.print()
-        a = var("a", bv3)
-        a_p1 = var("a_p1", bv3)
-        b = var("b", bv3)
-        b_p1 = var("b_p1", bv3)
-        should_inc = var("should_inc", smt.BoolSort())
-        result = var("result", bv3)
-        assert model_no_a.validate()
-        assert model_no_a == \
-            Model(
+        elided = "a" if kept == "b" else "b"
+        x, x_p1 = _INC_AB_COUNTERS[kept]
+        should_inc = _SHOULD_INC
+        result = _RESULT
+        if coi_conf == COIConf.KEEP_COI:
+            important_signals = [kept]
+        else:
+            important_signals = ["should_inc", kept, kept + "_p1", "result"]
+        model = parse(_RTL_INC_AB, "top", important_signals=important_signals, coi_conf=coi_conf)
+        dump_model(model)
+        if coi_conf == COIConf.KEEP_COI:
+            expected = Model(
                 "top",
                 inputs=[should_inc],
-                outputs=[result],
-                state=[b, b_p1],
-                # `a` appears in the expression for `result`, but is not declared important
-                # therefore, it is modeled as a 1-arity uninterpreted function
-                ufs=[UFPlaceholder("a", bv3, (), True)],
-                logic={
-                    b_p1: b + 1,
-                    result: (~a) | (~b)
-                },
-                transition={b: should_inc.ite(b_p1, b)},
+                outputs=[],
+                # Even though `x_p1` isn't specified as important, it's still in the COI
+                state=[x, x_p1],
+                logic={x_p1: x + 1},
+                transition={x: should_inc.ite(x_p1, x)},
             )
-        model_no_b = verilog_to_model(rtl, "top", important_signals=["should_inc", "a", "a_p1", "result"])
-        assert model_no_b.validate()
-        assert model_no_b == \
-            Model(
+        else:
+            # The elided counter appears in the expression for `result`, but is not declared
+            # important; therefore, it is modeled as an uninterpreted function
+            uf_args = (should_inc,) if coi_conf == COIConf.UF_ARGS_COI else ()
+            expected = Model(
                 "top",
                 inputs=[should_inc],
                 outputs=[result],
-                state=[a, a_p1],
-                # `b` appears in the expression for `result`, but is not declared important
-                # therefore, it is modeled as a 1-arity uninterpreted function
-                ufs=[UFPlaceholder("b", bv3, (), True)],
+                state=[x, x_p1],
+                ufs=[UFPlaceholder(elided, _BV3, uf_args, True)],
                 logic={
-                    a_p1: a + 1,
-                    result: (~a) | (~b)
+                    x_p1: x + 1,
+                    result: (~_A) | (~_B)
                 },
-                transition={a: should_inc.ite(a_p1, a)},
+                transition={x: should_inc.ite(x_p1, x)},
             )
+        check_equiv(model, expected)
 
-    def test_verilog_single_imp_uf_coi_logic(self):
-        """
-        Tests generation of a model from a single RTL module with specified important signals.
-        `coi_conf` is `UF_ARGS_COI`, meaning that non-important signals are replaced with uninterpreted
-        functions. Unlike `NO_COI`, these UF terms have important arguments in their COI as arguments.
-        """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input should_inc, output [2:0] result);
-                reg [2:0] a;
-                reg [2:0] b;
-                wire [2:0] a_p1;
-                wire [2:0] b_p1;
-                always @(posedge clk) begin
-                    if (should_inc) begin
-                        a = a_p1;
-                        b = b_p1;
-                    end
-                end
-                assign a_p1 = a + 3'h1;
-                assign b_p1 = b + 3'h1;
-                assign result = ~a | ~b;
-            endmodule
-            """)
-        bv3 = smt.BVSort(3)
-        var = smt.Variable
-        model_no_a = verilog_to_model(
-            rtl,
-            "top",
-            important_signals=["should_inc", "b", "b_p1", "result"],
-            coi_conf=COIConf.UF_ARGS_COI,
-        )
-        model_no_a.print()
-        a = var("a", bv3)
-        a_p1 = var("a_p1", bv3)
-        b = var("b", bv3)
-        b_p1 = var("b_p1", bv3)
-        should_inc = var("should_inc", smt.BoolSort())
-        result = var("result", bv3)
-        assert model_no_a.validate()
-        assert model_no_a == \
-            Model(
-                "top",
-                inputs=[should_inc],
-                outputs=[result],
-                state=[b, b_p1],
-                # `a` appears in the expression for `result`, but is not declared important
-                # therefore, it is modeled as an uninterpreted function
-                ufs=[UFPlaceholder("a", bv3, (should_inc,), True)],
-                logic={
-                    b_p1: b + 1,
-                    result: (~a) | (~b)
-                },
-                transition={b: should_inc.ite(b_p1, b)},
-            )
-        model_no_b = verilog_to_model(
-            rtl,
-            "top",
-            important_signals=["should_inc", "a", "a_p1", "result"],
-            coi_conf=COIConf.UF_ARGS_COI,
-        )
-        assert model_no_b.validate()
-        assert model_no_b == \
-            Model(
-                "top",
-                inputs=[should_inc],
-                outputs=[result],
-                state=[a, a_p1],
-                # `b` appears in the expression for `result`, but is not declared important
-                # therefore, it is modeled as an uninterpreted function
-                ufs=[UFPlaceholder("b", bv3, (should_inc,), True)],
-                logic={
-                    a_p1: a + 1,
-                    result: (~a) | (~b)
-                },
-                transition={a: should_inc.ite(a_p1, a)},
-            )
-
-    def test_verilog_single_imp_uf_coi_temporal_state(self):
+    def test_verilog_single_imp_uf_coi_temporal_state(self, parse, check_equiv, dump_model):
         """
         Tests generation of a model from a single RTL module with specified important signals.
 
@@ -169,27 +155,14 @@ class TestVerilogUfs:
         Furthermore, every state variable but `b` happens to depend on an important variable, or one
         that is modeled as a UF. Accordingly, only `b` needs an extra degree of freedom argument.
         """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input [1:0] in, input [1:0] ignore, output [1:0] out);
-                reg [1:0] a;
-                reg [1:0] b;
-                reg [1:0] c;
-                always @(posedge clk) begin
-                    a <= in + 1;
-                    c <= b;
-                end
-                assign b = a & ignore;
-                assign out = c;
-            endmodule
-            """)
-        actual_model = verilog_to_model(
+        rtl = _RTL_SINGLE_IMP_UF_COI_TEMPORAL_STATE
+        actual_model = parse(
             rtl,
             "top",
             important_signals=["out", "in"],
             coi_conf=COIConf.UF_ARGS_COI
         )
-        actual_model.print()
-        assert actual_model.validate()
+        dump_model(actual_model)
         bv2 = smt.BVSort(2)
         in_ = smt.Variable("in", bv2)
         out = smt.Variable("out", bv2)
@@ -210,61 +183,7 @@ class TestVerilogUfs:
             logic={out: smt.Variable("c", bv2)}
         )
         assert exp_model.validate()
-        assert actual_model == exp_model
-
-    def test_verilog_single_imp_keep_coi(self):
-        """
-        Tests generation of a model from a single RTL module with specified important signals.
-        `coi_conf` is KEEP_COI, meaning any signal in the COI of an important signal is kept.
-        """
-        rtl = textwrap.dedent("""\
-            module top(input clk, input should_inc, output [2:0] result);
-                reg [2:0] a;
-                reg [2:0] b;
-                wire [2:0] a_p1;
-                wire [2:0] b_p1;
-                always @(posedge clk) begin
-                    if (should_inc) begin
-                        a = a_p1;
-                        b = b_p1;
-                    end
-                end
-                assign a_p1 = a + 3'h1;
-                assign b_p1 = b + 3'h1;
-                assign result = ~a | ~b;
-            endmodule
-            """)
-        model_no_a = verilog_to_model(rtl, "top", important_signals=["b"], coi_conf=COIConf.KEEP_COI)
-        model_no_b = verilog_to_model(rtl, "top", important_signals=["a"], coi_conf=COIConf.KEEP_COI)
-        model_no_a.print()
-        model_no_b.print()
-        bv3 = smt.BVSort(3)
-        var = smt.Variable
-        a = var("a", bv3)
-        a_p1 = var("a_p1", bv3)
-        b = var("b", bv3)
-        b_p1 = var("b_p1", bv3)
-        should_inc = var("should_inc", smt.BoolSort())
-        assert model_no_a.validate()
-        assert model_no_a == Model(
-            "top",
-            inputs=[should_inc],
-            outputs=[],
-            # Even though `b_p1` isn't specified as important, it's still in the COI
-            state=[b, b_p1],
-            logic={b_p1: b + 1},
-            transition={b: should_inc.ite(b_p1, b)},
-        )
-        assert model_no_b.validate()
-        assert model_no_b == Model(
-            "top",
-            inputs=[should_inc],
-            outputs=[],
-            # Even though `a_p1` isn't specified as important, it's still in the COI
-            state=[a, a_p1],
-            logic={a_p1: a + 1},
-            transition={a: should_inc.ite(a_p1, a)},
-        )
+        check_equiv(actual_model, exp_model)
 
     @pytest.mark.skip()
     def test_verilog_output_unimp(self):
@@ -272,47 +191,13 @@ class TestVerilogUfs:
         # but the output itself is non-important
         assert False
 
-    def test_verilog_nested_child_no_coi(self):
+    def test_verilog_nested_child_no_coi(self, parse, check_equiv, dump_model):
         """
         Tests behavior for when a child module itself has another child module.
 
         Note also that there are many shared signal names.
         """
-        rtl = textwrap.dedent("""
-            module inner2(input clk, input [3:0] value, output [3:0] o);
-                reg [3:0] state;
-                always @(posedge clk) begin
-                    state = value + 4'h1;
-                end
-                assign o = state ^ 4'b1111;
-            endmodule
-
-            module inner1(input clk, input [3:0] value, output [3:0] o);
-                reg [3:0] state;
-                wire [3:0] inner_s;
-                inner2 inst(
-                    .value(value),
-                    .o(inner_s)
-                );
-                always @(posedge clk) begin
-                    state = inner_s ^ value;
-                end
-                assign o = state | 4'b110;
-            endmodule
-
-            module top(input clk, input [3:0] value, output [3:0] o);
-                reg [3:0] state;
-                wire [3:0] inner_s;
-                inner1 inst(
-                    .value(state),
-                    .o(inner_s)
-                );
-                always @(posedge clk) begin
-                    state = inner_s & value;
-                end
-                assign o = inner_s;
-            endmodule
-            """)
+        rtl = _RTL_NESTED_CHILD
         bvar = smt.bv_variable
         value = bvar("value", 4)
         o = bvar("o", 4)
@@ -347,18 +232,15 @@ class TestVerilogUfs:
         assert exp_inner2.validate()
         assert exp_inner1.validate()
         assert exp_top.validate()
-        top = verilog_to_model(rtl, "top")
-        top.print()
+        top = parse(rtl, "top")
+        dump_model(top)
         inner1 = top.instances["inst"].model
-        inner1.print()
+        dump_model(inner1)
         inner2 = inner1.instances["inst"].model
-        inner2.print()
-        assert inner2.validate()
-        assert inner1.validate()
-        assert top.validate()
-        assert inner2 == exp_inner2
-        assert inner1 == exp_inner1
-        assert top == exp_top
+        dump_model(inner2)
+        check_equiv(inner2, exp_inner2)
+        check_equiv(inner1, exp_inner1)
+        check_equiv(top, exp_top)
 
     @pytest.mark.skip()
     def test_verilog_nested_child_coi(self):
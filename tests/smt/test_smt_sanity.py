@@ -1,6 +1,7 @@
 
 import random
 import os
+import pickle
 
 import cvc5
 
@@ -26,6 +27,32 @@ class TestSMT:
         actual = expr.replace_vars({a: renamed})
         assert actual == expected
 
+    def test_cached_hash_eq(self):
+        """
+        Tests that equality and hashing of composite terms, whose hashes are cached, agree with
+        structural equality, including across a pickle round trip.
+        """
+        v = smt.Variable
+        s = smt.BVSort(4)
+        a = v("a", s)
+        b = v("b", s)
+        expr = (a + b).op_eq(a | b)
+        same = (a + b).op_eq(a | b)
+        different = (a + b).op_eq(a & b)
+        assert expr is not same
+        assert expr == same and hash(expr) == hash(same)
+        assert expr != different
+        assert {expr: 0}[same] == 0
+        unpickled = pickle.loads(pickle.dumps(expr))
+        assert unpickled == expr and hash(unpickled) == hash(expr)
+
+    def test_sorts_interned(self):
+        assert smt.BVSort(4) is smt.BVSort(4)
+        assert smt.BVSort(4) != smt.BVSort(5)
+        assert smt.BoolSort() is smt.BoolSort()
+        assert pickle.loads(pickle.dumps(smt.BVSort(4))) is smt.BVSort(4)
+        assert pickle.loads(pickle.dumps(smt.BoolSort())) is smt.BoolSort()
+
     def test_from_cvc5(self):
         c_slv = cvc5.Solver()
         c_slv.setOption("sygus", "true")
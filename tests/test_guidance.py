@@ -1,8 +1,19 @@
 
+import pytest
+
 from rtl2model.guidance import Guidance, AnnoType
 from rtl2model.synthesis_template import *
 import rtl2model.lynth.smt as smt
 
+# Signals shared by the tests that annotate a testbench with a vector signal
+_TB_SIGNALS = (
+    S("tb", "reset", 1),
+    S("tb", "clk", 1),
+    S("tb", "data", 8, bounds=(0, 7)),
+    S("tb", "a", 8),
+    S("tb", "b", 8),
+)
+
 class TestGuidance:
 
     def test_guard_annotation(self):
@@ -11,6 +22,10 @@ class TestGuidance:
         a_var = a_sig.to_variable()
         b_var = smt.bv_variable("b", 32)
         o_var = smt.bv_variable("o", 32)
+        pc_var = pc_sig.to_variable()
+        pc_eq6 = pc_var.op_eq(6)
+        pc_eq7 = pc_var.op_eq(7)
+        pc_eq8 = pc_var.op_eq(8)
         signals = [
             S("Tile", "reset", 1),
             pc_sig,
@@ -21,22 +36,29 @@ class TestGuidance:
         guidance.annotate("reset", AnnoType.ASSUME)
         # Maps predicates to corresponding AnnoType
         guidance.annotate("a", {
-            pc_sig.to_variable().op_eq(6): AnnoType.Param(a_var),
+            pc_eq6: AnnoType.Param(a_var),
             smt.BoolConst.T: AnnoType.DONT_CARE,
         })
         guidance.annotate("b", {
-            pc_sig.to_variable().op_eq(6): AnnoType.ASSUME,
-            pc_sig.to_variable().op_eq(7): AnnoType.Param(b_var),
-            pc_sig.to_variable().op_eq(8): AnnoType.Output(o_var),
+            pc_eq6: AnnoType.ASSUME,
+            pc_eq7: AnnoType.Param(b_var),
+            pc_eq8: AnnoType.Output(o_var),
             smt.BoolConst.T: AnnoType.ASSUME,
         })
         assert guidance.get_annotation_at("a", 4) is None
         assert guidance.get_predicated_annotations("a") == {
-            pc_sig.to_variable().op_eq(6): [AnnoType.Param(a_var)],
+            pc_eq6: [AnnoType.Param(a_var)],
             smt.BoolConst.T: [AnnoType.DONT_CARE],
         }
         assert guidance.get_outputs() == {
-            (o_var, "Tile->b", pc_sig.to_variable().op_eq(8))
+            (o_var, "Tile->b", pc_eq8)
+        }
+        # Modifying the returned annotations must not affect the guidance
+        guidance.get_predicated_annotations("b")[pc_eq6].append(AnnoType.Output(o_var))
+        guidance.get_predicated_annotations("b")[pc_eq7] = [AnnoType.Output(o_var)]
+        assert guidance.get_predicated_annotations("b")[pc_eq6] == [AnnoType.ASSUME]
+        assert guidance.get_outputs() == {
+            (o_var, "Tile->b", pc_eq8)
         }
 
     def test_output_annotations(self):
@@ -54,6 +76,21 @@ class TestGuidance:
         guidance.annotate("c", {9: AnnoType.Output(c_var)})
         outputs = guidance.get_outputs()
         assert outputs == {(b_var, "Tile->b", 8), (c_var, "Tile->c", 9)}
+        guidance.annotate("b", {8: AnnoType.ASSUME, 7: AnnoType.Output(b_var)})
+        outputs = guidance.get_outputs()
+        assert outputs == {(b_var, "Tile->b", 7), (c_var, "Tile->c", 9)}
+        # A uniform output annotation applies to every cycle not overridden
+        a_var = smt.bv_variable("a", 32)
+        guidance.annotate("a", AnnoType.Output(a_var))
+        guidance.annotate("a", {2: AnnoType.ASSUME})
+        outputs = guidance.get_outputs()
+        assert outputs == {(b_var, "Tile->b", 7), (c_var, "Tile->c", 9)} | {
+            (a_var, "Tile->a", n) for n in range(10) if n != 2
+        }
+        guidance.num_cycles = 4
+        assert guidance.get_outputs() == {(b_var, "Tile->b", 7), (c_var, "Tile->c", 9)} | {
+            (a_var, "Tile->a", n) for n in range(4) if n != 2
+        }
 
     def test_subscript_annotations(self):
         signals = [
@@ -75,17 +112,7 @@ class TestGuidance:
         assert guidance.get_annotation_at("data[1]", 7) == AnnoType.DONT_CARE
 
     def test_guidance_iterate(self):
-        signals = [
-            S("tb", "reset", 1),
-            S("tb", "clk", 1),
-            S("tb", "data", 8, bounds=(0, 7)),
-            S("tb", "a", 8),
-            S("tb", "b", 8)
-        ]
-        guidance = Guidance(signals, 10)
-        found_params = set()
-        found_assumes = set()
-        found_outputs = set()
+        guidance = Guidance(list(_TB_SIGNALS), 10)
         guidance.annotate("reset", {0: AnnoType.ASSUME})
         a_var = smt.bv_variable("a", 8)
         d0_var = smt.bv_variable("d0", 8)
@@ -95,33 +122,42 @@ class TestGuidance:
         guidance.annotate("b", {8: AnnoType.Output(o_var)})
         guidance.annotate("data[0]", {7: AnnoType.Param(d0_var)})
         guidance.annotate("data[3]", {3: AnnoType.Param(d1_var)})
-        for cycle in range(guidance.num_cycles):
-            for ind, signal in enumerate(guidance.signals):
-                for qp in signal.get_all_qp_instances():
-                    atype = guidance.get_annotation_at(qp, cycle)
-                    if atype.is_dont_care():
-                        pass
-                    elif atype.is_assume():
-                        found_assumes.add((qp, cycle))
-                    elif atype.is_param():
-                        found_params.add((qp, cycle))
-                    elif atype.is_output():
-                        found_outputs.add((qp, cycle))
-                    else:
-                        raise TypeError("invalid AnnoType: " + str(atype))
+        def probe_all():
+            found = []
+            for cycle in range(guidance.num_cycles):
+                for signal in guidance.signals:
+                    for qp in signal.get_all_qp_instances():
+                        atype = guidance.get_annotation_at(qp, cycle)
+                        if atype.is_dont_care():
+                            pass
+                        elif atype.is_assume() or atype.is_param() or atype.is_output():
+                            found.append((qp, cycle, atype))
+                        else:
+                            raise TypeError("invalid AnnoType: " + str(atype))
+            return found
+        # AnnoType isn't hashable, so sort instead of comparing as sets
+        by_position = lambda item: item[:2]
+        items = guidance.get_cycle_annotations()
+        # get_cycle_annotations must agree with probing every cycle of every signal
+        assert sorted(items, key=by_position) == sorted(probe_all(), key=by_position)
+        found_params = {(qp, cycle) for qp, cycle, atype in items if atype.is_param()}
+        found_assumes = {(qp, cycle) for qp, cycle, atype in items if atype.is_assume()}
+        found_outputs = {(qp, cycle) for qp, cycle, atype in items if atype.is_output()}
         assert found_params == {("tb->a", 7), ("tb->data[0]", 7), ("tb->data[3]", 3)}
         assert found_assumes == {("tb->reset", 0), ("tb->a", 3)}
         assert found_outputs == {("tb->b", 8)}
+        # A uniform output annotation applies to every cycle, and get_outputs must agree
+        guidance.annotate("b", AnnoType.Output(o_var))
+        items = guidance.get_cycle_annotations()
+        assert sorted(items, key=by_position) == sorted(probe_all(), key=by_position)
+        found_outputs = {(qp, cycle) for qp, cycle, atype in items if atype.is_output()}
+        assert found_outputs == {("tb->b", n) for n in range(10)}
+        assert guidance.get_outputs() == {
+            (atype.expr, qp, cycle) for qp, cycle, atype in items if atype.is_output()
+        }
 
     def test_guidance_indexed(self):
-        signals = [
-            S("tb", "reset", 1),
-            S("tb", "clk", 1),
-            S("tb", "data", 8, bounds=(0, 7)),
-            S("tb", "a", 8),
-            S("tb", "b", 8)
-        ]
-        guidance = Guidance(signals, 10)
+        guidance = Guidance(list(_TB_SIGNALS), 10)
         found_params = set()
         found_assumes = set()
         found_outputs = set()
@@ -149,3 +185,93 @@ class TestGuidance:
         assert found_assumes == [(b_eqz, ((5, 4), (1, 0))), (smt.BoolConst.T, [])]
         print(found_params[0]   )
         assert found_params == [(b_eqz, d0_var, [(3, 2)])]
+
+    def test_mixed_annotation_kinds(self):
+        signals = [
+            S("tb", "a", 8),
+            S("tb", "b", 8),
+            S("tb", "c", 8),
+            S("tb", "d", 8),
+            S("tb", "e", 8),
+        ]
+        guidance = Guidance(signals, 10)
+        b_var = smt.bv_variable("b", 8)
+        guidance.annotate("a", {3: AnnoType.ASSUME})
+        with pytest.raises(Exception):
+            guidance.annotate("a", {b_var.op_eq(0): AnnoType.ASSUME})
+        guidance.annotate("b", {b_var.op_eq(0): AnnoType.ASSUME})
+        with pytest.raises(Exception):
+            guidance.annotate("b", {3: AnnoType.ASSUME})
+        with pytest.raises(Exception):
+            guidance.annotate("b", [AnnoType.ASSUME])
+        assert guidance.get_annotation_at("b", 3) is None
+        # A uniform annotation may still be refined by predicates
+        guidance.annotate("c", AnnoType.ASSUME)
+        assert guidance.get_annotation_at("c", 5) == AnnoType.ASSUME
+        assert guidance.get_predicated_annotations("c") == {}
+        guidance.annotate("c", {b_var.op_eq(1): AnnoType.DONT_CARE})
+        assert guidance.get_annotation_at("c", 5) is None
+        # Empty annotations don't fix whether a signal is keyed by cycle or predicate
+        guidance.annotate_cycle_dict("d", {})
+        guidance.annotate("d", {b_var.op_eq(0): AnnoType.ASSUME})
+        guidance.annotate_predicate_dict("e", {})
+        guidance.annotate("e", {3: AnnoType.ASSUME})
+        assert guidance.get_annotation_at("e", 3) == AnnoType.ASSUME
+
+    def test_list_annotations(self):
+        signals = [
+            S("tb", "a", 8),
+            S("tb", "b", 8),
+        ]
+        guidance = Guidance(signals, 4)
+        a_var = smt.bv_variable("a", 8)
+        guidance.annotate("a", [
+            AnnoType.DONT_CARE,
+            AnnoType.ASSUME,
+            AnnoType.DONT_CARE,
+            AnnoType.Param(a_var),
+        ])
+        assert [guidance.get_annotation_at("a", c) for c in range(4)] == [
+            AnnoType.DONT_CARE,
+            AnnoType.ASSUME,
+            AnnoType.DONT_CARE,
+            AnnoType.Param(a_var),
+        ]
+        guidance.annotate("b", AnnoType.ASSUME)
+        guidance.annotate("b", [AnnoType.DONT_CARE, AnnoType.ASSUME])
+        assert [guidance.get_annotation_at("b", c) for c in range(4)] == [
+            AnnoType.DONT_CARE,
+            AnnoType.ASSUME,
+            AnnoType.ASSUME,
+            AnnoType.ASSUME,
+        ]
+        assert guidance.get_cycle_annotations() == [
+            ("tb->a", 1, AnnoType.ASSUME),
+            ("tb->a", 3, AnnoType.Param(a_var)),
+            ("tb->b", 1, AnnoType.ASSUME),
+            ("tb->b", 2, AnnoType.ASSUME),
+            ("tb->b", 3, AnnoType.ASSUME),
+        ]
+
+    def test_specialized_annotate(self):
+        signals = [
+            S("tb", "a", 8),
+            S("tb", "b", 8),
+            S("tb", "c", 1),
+        ]
+        guidance = Guidance(signals, 3)
+        c_var = smt.bv_variable("c", 1)
+        guidance.annotate_uniform("a", AnnoType.ASSUME)
+        guidance.annotate_cycle_dict("a", {1: AnnoType.DONT_CARE})
+        guidance.annotate_cycle_list("b", [AnnoType.ASSUME])
+        guidance.annotate_predicate_dict("c", {c_var: AnnoType.ASSUME})
+        assert [guidance.get_annotation_at("a", c) for c in range(3)] == [
+            AnnoType.ASSUME,
+            AnnoType.DONT_CARE,
+            AnnoType.ASSUME,
+        ]
+        assert guidance.get_annotation_at("b", 0) == AnnoType.ASSUME
+        assert guidance.get_annotation_at("b", 1) == AnnoType.DONT_CARE
+        assert guidance.get_predicated_annotations("c") == {c_var: [AnnoType.ASSUME]}
+        with pytest.raises(Exception):
+            guidance.annotate_cycle_dict("c", {0: AnnoType.ASSUME})